@@ -18,6 +18,9 @@ from dotenv import load_dotenv
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Seconds Telegram holds a getUpdates request open waiting for new commands
+LONG_POLL_TIMEOUT = 30
+
 @dataclass
 class ArbitrageStats:
     """Statistiken für Arbitrage-Activities"""
@@ -101,8 +104,8 @@ class EnhancedTelegramBot:
             
         while True:
             try:
+                # Long poll - Telegram holds the request open until a command arrives, so no sleep
                 await self.check_commands()
-                await asyncio.sleep(2)  # Check every 2 seconds
             except Exception as e:
                 logger.debug(f"Command polling error: {e}")
                 await asyncio.sleep(5)
@@ -111,9 +114,16 @@ class EnhancedTelegramBot:
         """Check for new Telegram commands"""
         try:
             url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-            params = {'offset': self.last_update_id + 1, 'timeout': 1}
+            params = {
+                'offset': self.last_update_id + 1,
+                'timeout': LONG_POLL_TIMEOUT,
+                'allowed_updates': json.dumps(['message'])
+            }
             
-            response = requests.get(url, params=params, timeout=5)
+            # Blocking long poll, so it runs in a worker thread instead of stalling the event loop
+            response = await asyncio.to_thread(
+                requests.get, url, params=params, timeout=LONG_POLL_TIMEOUT + 10
+            )
             if response.status_code == 200:
                 data = response.json()
                 
@@ -124,9 +134,12 @@ class EnhancedTelegramBot:
                         message = update['message']
                         if message.get('chat', {}).get('id') == int(self.chat_id):
                             await self.handle_command(message)
+            else:
+                await asyncio.sleep(5)  # Rejected (rate limit, conflicting poller) - back off
                             
         except Exception as e:
             logger.debug(f"Error checking commands: {e}")
+            await asyncio.sleep(5)  # Don't hammer Telegram while it is failing
     
     async def handle_command(self, message: Dict[str, Any]):
         """Handle incoming Telegram command"""
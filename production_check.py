@@ -10,6 +10,15 @@ import asyncio
 from web3 import Web3
 from dotenv import load_dotenv
 
+# ERC20 balanceOf(address) selector - encoded by hand to skip the web3 contract factory
+BALANCE_OF_SELECTOR = bytes.fromhex('70a08231')
+
+def balance_of(w3: Web3, token: str, holder: str) -> int:
+    """Read an ERC20 balance with a raw eth_call"""
+    data = BALANCE_OF_SELECTOR + bytes(12) + bytes.fromhex(holder[2:])
+    result = w3.eth.call({'to': token, 'data': '0x' + data.hex()})
+    return int.from_bytes(result, 'big')
+
 async def check_production_readiness():
     """Comprehensive production readiness check"""
     print("🔴 PRODUCTION READINESS CHECK")
@@ -68,11 +77,9 @@ async def check_production_readiness():
                 
                 # Check contract balance (USDT)
                 usdt_contract = "0x55d398326f99059fF775485246999027B3197955"  # BSC USDT
-                usdt_abi = [{"constant":True,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"type":"function"}]
-                usdt = w3.eth.contract(address=usdt_contract, abi=usdt_abi)
                 
                 try:
-                    contract_usdt_balance = usdt.functions.balanceOf(contract_address).call()
+                    contract_usdt_balance = balance_of(w3, usdt_contract, contract_address)
                     contract_usdt_formatted = contract_usdt_balance / 1e18
                     print(f"   💰 Contract USDT: {contract_usdt_formatted:.6f}")
                     
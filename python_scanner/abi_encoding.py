@@ -0,0 +1,64 @@
+"""
+Hand-rolled ABI encoders for the hot-path calls of both scanners
+- Selectors are constants and calldata is built by byte concatenation instead of eth_abi
+- Covered byte for byte against eth_abi in tests/test_abi_encoding.py
+"""
+
+from typing import List
+
+# Multicall3 (same address on BSC as on every other EVM chain) - aggregate3((address,bool,bytes)[])
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+AGGREGATE3_SELECTOR = bytes.fromhex('82ad56cb')
+
+# Pair getters (no arguments, so the calldata is just the selector)
+TOKEN0_SELECTOR = bytes.fromhex('0dfe1681')
+TOKEN1_SELECTOR = bytes.fromhex('d21220a7')
+GET_RESERVES_SELECTOR = bytes.fromhex('0902f1ac')
+
+# getAmountsOut(uint256,address[]) on the routers
+GET_AMOUNTS_OUT_SELECTOR = bytes.fromhex('d06ca61f')
+
+# getPair(address,address) on the factories
+GET_PAIR_SELECTOR = bytes.fromhex('e6a43905')
+
+# Static head of getAmountsOut calldata for a 2-hop path: path offset (0x40) and path length (2)
+_GET_AMOUNTS_OUT_PATH_HEAD = (0x40).to_bytes(32, 'big') + (2).to_bytes(32, 'big')
+
+def encode_get_amounts_out(amount_in: int, token_in: bytes, token_out: bytes) -> bytes:
+    """Encode getAmountsOut(amount_in, [token_in, token_out]) for raw 20-byte addresses"""
+    return (
+        GET_AMOUNTS_OUT_SELECTOR
+        + amount_in.to_bytes(32, 'big')
+        + _GET_AMOUNTS_OUT_PATH_HEAD
+        + bytes(12) + token_in
+        + bytes(12) + token_out
+    )
+
+def encode_get_pair(token_a: bytes, token_b: bytes) -> bytes:
+    """Encode getPair(token_a, token_b) for raw 20-byte addresses"""
+    return GET_PAIR_SELECTOR + bytes(12) + token_a + bytes(12) + token_b
+
+def encode_aggregate3_call(target: bytes, calldata: bytes) -> bytes:
+    """Encode one Multicall3 Call3 tuple (target, allowFailure=True, calldata) for a raw 20-byte target"""
+    return (
+        bytes(12) + target
+        + (1).to_bytes(32, 'big')
+        + (0x60).to_bytes(32, 'big')
+        + len(calldata).to_bytes(32, 'big')
+        + calldata + bytes(-len(calldata) % 32)
+    )
+
+def encode_aggregate3(calls: List[bytes]) -> bytes:
+    """Encode aggregate3 calldata from already encoded Call3 tuples"""
+    offsets = []
+    position = 32 * len(calls)
+    for call in calls:
+        offsets.append(position.to_bytes(32, 'big'))
+        position += len(call)
+    return (
+        AGGREGATE3_SELECTOR
+        + (0x20).to_bytes(32, 'big')
+        + len(calls).to_bytes(32, 'big')
+        + b''.join(offsets)
+        + b''.join(calls)
+    )
@@ -0,0 +1,25 @@
+"""
+Checksummed BSC mainnet addresses
+- Constants are checksummed once at import instead of at every call site
+- checksum_address() memoises dynamic addresses (pair tokens, factory results)
+"""
+
+from functools import lru_cache
+from web3 import Web3
+
+# Tokens
+BUSD = Web3.to_checksum_address('0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56')
+USDC = Web3.to_checksum_address('0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d')
+
+# DEX routers
+PANCAKE_ROUTER = Web3.to_checksum_address('0x10ED43C718714eb63d5aA57B78B54704E256024E')
+BISWAP_ROUTER = Web3.to_checksum_address('0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8')
+
+# Deployed contracts
+CONTRACT_SIMPLE = Web3.to_checksum_address('0xfe9cfddc6270480507E810C4F2a1EA16a88F90cc')  # Simple arbitrage (pre-funded)
+CONTRACT_V2 = Web3.to_checksum_address('0x86742335Ec7CC7bBaa7d4244841c315Cf1978eAE')  # Real flashloan arbitrage
+
+@lru_cache(maxsize=4096)
+def checksum_address(address) -> str:
+    """Web3.to_checksum_address, cached (accepts hex strings or raw 20-byte addresses)"""
+    return Web3.to_checksum_address(address)
@@ -0,0 +1,159 @@
+"""
+Shared BSC client for the contract test scripts
+- One Web3 connection, pooled HTTP session, account and contract objects, built once at import
+- Every test script imports these instead of setting up its own
+"""
+
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from web3 import Web3
+from dotenv import load_dotenv
+from addresses import BUSD, CONTRACT_SIMPLE, CONTRACT_V2
+
+load_dotenv()
+
+__all__ = [
+    'RPC_URL', 'SESSION', 'W3', 'ACCOUNT', 'rpc_call',
+    'BUSD_ABI', 'SIMPLE_CONTRACT_ABI', 'V2_CONTRACT_ABI',
+    'BUSD_CONTRACT', 'SIMPLE_CONTRACT', 'V2_CONTRACT'
+]
+
+# BUSD contract ABI (minimal)
+BUSD_ABI = [
+    {
+        "inputs": [{"internalType": "address", "name": "account", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "to", "type": "address"},
+            {"internalType": "uint256", "name": "amount", "type": "uint256"}
+        ],
+        "name": "transfer",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "spender", "type": "address"},
+            {"internalType": "uint256", "name": "amount", "type": "uint256"}
+        ],
+        "name": "approve",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+
+# Simple arbitrage contract ABI (minimal)
+SIMPLE_CONTRACT_ABI = [
+    {
+        "inputs": [
+            {"internalType": "address", "name": "token", "type": "address"},
+            {"internalType": "uint256", "name": "amount", "type": "uint256"}
+        ],
+        "name": "depositToken",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "token", "type": "address"}
+        ],
+        "name": "getTokenBalance",
+        "outputs": [
+            {"internalType": "uint256", "name": "", "type": "uint256"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+# V2 flashloan contract ABI (only the functions the test scripts use)
+V2_CONTRACT_ABI = [
+    {
+        "inputs": [],
+        "name": "owner",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "tokenA", "type": "address"},
+            {"internalType": "address", "name": "tokenB", "type": "address"}
+        ],
+        "name": "getPairAddress",
+        "outputs": [
+            {"internalType": "address", "name": "pair", "type": "address"}
+        ],
+        "stateMutability": "pure",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "tokenBorrow", "type": "address"},
+            {"internalType": "address", "name": "tokenTarget", "type": "address"},
+            {"internalType": "uint256", "name": "amount", "type": "uint256"},
+            {"internalType": "address", "name": "buyRouter", "type": "address"},
+            {"internalType": "address", "name": "sellRouter", "type": "address"}
+        ],
+        "name": "checkProfitability",
+        "outputs": [
+            {"internalType": "uint256", "name": "profit", "type": "uint256"},
+            {"internalType": "bool", "name": "profitable", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+RPC_URL = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
+
+# Pooled keep-alive session so every call reuses a warm TLS connection (also used for raw batch RPC)
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    # Retry POSTs only when the connection failed - a request that reached the node may have been
+    # an eth_sendRawTransaction, and resending it reports "already known" for a broadcast that went out
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1, allowed_methods=None)
+))
+
+# Nothing here touches the network until the first call
+W3 = Web3(Web3.HTTPProvider(RPC_URL, session=SESSION, request_kwargs={'timeout': 5}))
+
+_private_key = os.getenv('PRIVATE_KEY')
+ACCOUNT = W3.eth.account.from_key(_private_key) if _private_key else None
+
+BUSD_CONTRACT = W3.eth.contract(address=BUSD, abi=BUSD_ABI)
+SIMPLE_CONTRACT = W3.eth.contract(address=CONTRACT_SIMPLE, abi=SIMPLE_CONTRACT_ABI)
+V2_CONTRACT = W3.eth.contract(address=CONTRACT_V2, abi=V2_CONTRACT_ABI)
+
+# Network blips worth retrying - reverts (ContractLogicError) and bad input are not.
+# Connection failures (ConnectTimeout included) are already retried by SESSION's adapter, so they aren't retried here
+TRANSIENT_ERRORS = (requests.Timeout, requests.HTTPError)
+
+# A send that timed out may still have reached the node - resending it is never safe
+NON_IDEMPOTENT = ('send_raw_transaction', 'send_transaction', 'transact')
+
+def rpc_call(fn, *args, attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0):
+    """Call fn(*args), retrying read timeouts and HTTP errors with exponential backoff (sends run once)"""
+    if getattr(fn, '__name__', '') in NON_IDEMPOTENT:
+        attempts = 1
+        
+    for attempt in range(attempts):
+        try:
+            return fn(*args)
+        except TRANSIENT_ERRORS as e:
+            if isinstance(e, requests.ConnectionError) or attempt == attempts - 1:
+                raise
+            time.sleep(min(max_delay, base_delay * 2 ** attempt))
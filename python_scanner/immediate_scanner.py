@@ -5,32 +5,139 @@ Executes trades immediately when profitable opportunities are found
 
 import time
 import logging
+import logging.handlers
+import queue
+import atexit
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from collections import Counter
 from decimal import Decimal
 import json
 from web3 import Web3
 from web3.exceptions import ContractLogicError, TransactionNotFound
+from eth_abi import decode
+from eth_keys import keys
+import rlp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 import os
 import asyncio
 import aiohttp
+import heapq
+from abi_encoding import (
+    GET_RESERVES_SELECTOR, MULTICALL3_ADDRESS,
+    encode_aggregate3, encode_aggregate3_call, encode_get_amounts_out, encode_get_pair
+)
+
+# uvloop is POSIX-only - fall back to the default event loop elsewhere (e.g. Windows)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+# orjson is much faster on large multicall payloads - fall back to the stdlib json module
+try:
+    import orjson
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+        
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
 
 # Load environment variables
 load_dotenv()
 
 # Configure logging for Windows compatibility
+# Records are formatted by the QueueHandler and written by a listener thread,
+# so file/console I/O never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler('immediate_arbitrage.log', encoding='utf-8'),
+    logging.StreamHandler()
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('immediate_arbitrage.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
+EXECUTE_FLASHLOAN_SELECTOR = bytes(Web3.keccak(
+    text='executeFlashloan(address,uint256,uint256,address,address,address,address)'
+)[:4])
+BSC_CHAIN_ID = 56
+
+# Factory-confirmed flashloan pair addresses, kept across restarts
+PAIR_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pair_cache.json')
+
+# Byte offset of getAmountsOut's amount_in inside an encoded Call3 tuple (4-word head + selector)
+_CALL3_AMOUNT_IN_OFFSET = 4 * 32 + 4
+
+def encode_execute_flashloan(pair: str, amount0_out: int, amount1_out: int, token_borrow: str,
+                             token_target: str, buy_router: str, sell_router: str) -> bytes:
+    """Encode executeFlashloan(...) calldata - all arguments are static, so each is one padded word"""
+    return EXECUTE_FLASHLOAN_SELECTOR + b''.join([
+        bytes(12) + bytes.fromhex(pair[2:]),
+        amount0_out.to_bytes(32, 'big'),
+        amount1_out.to_bytes(32, 'big'),
+        bytes(12) + bytes.fromhex(token_borrow[2:]),
+        bytes(12) + bytes.fromhex(token_target[2:]),
+        bytes(12) + bytes.fromhex(buy_router[2:]),
+        bytes(12) + bytes.fromhex(sell_router[2:])
+    ])
+
+def sign_legacy_transaction(signing_key: keys.PrivateKey, nonce: int, gas_price: int, gas: int,
+                            to: bytes, data: bytes, chain_id: int) -> bytes:
+    """RLP-encode and sign an EIP-155 legacy transaction (value 0) without eth_account's dict validation"""
+    fields = [nonce, gas_price, gas, to, 0, data]
+    signature = signing_key.sign_msg_hash(Web3.keccak(rlp.encode(fields + [chain_id, 0, 0])))
+    return rlp.encode(fields + [signature.v + 35 + 2 * chain_id, signature.r, signature.s])
+
+def compute_v2_pair(factory: str, token_a: str, token_b: str, init_code_hash: str) -> str:
+    """Compute a Uniswap V2 style pair address offchain via CREATE2"""
+    token0, token1 = sorted([token_a.lower(), token_b.lower()])
+    salt = Web3.keccak(bytes.fromhex(token0[2:]) + bytes.fromhex(token1[2:]))
+    digest = Web3.keccak(b'\xff' + bytes.fromhex(factory[2:]) + salt + bytes.fromhex(init_code_hash[2:]))
+    return Web3.to_checksum_address(digest[12:])
+
+def v2_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int) -> int:
+    """Constant-product output amount for a V2 pool charging fee_bps"""
+    amount_in_with_fee = amount_in * (10000 - fee_bps)
+    return amount_in_with_fee * reserve_out // (reserve_in * 10000 + amount_in_with_fee)
+
+def best_round_trip(amount_in: int, reserves: List[Tuple[int, int]], fees_bps: List[int]) -> Tuple[int, int, int, List[int]]:
+    """
+    Find the best token_in -> token_out -> token_in route across DEXes.
+    reserves[i] is (reserve_in, reserve_out) on DEX i. Returns (buy_index, sell_index,
+    final_amount, amounts_out) where amounts_out[i] is the first-leg output on DEX i.
+    """
+    amounts_out = [
+        v2_out(amount_in, reserve_in, reserve_out, fee_bps)
+        for (reserve_in, reserve_out), fee_bps in zip(reserves, fees_bps)
+    ]
+    
+    best_buy, best_sell, best_final = -1, -1, 0
+    for buy, amount_out in enumerate(amounts_out):
+        for sell, (reserve_in, reserve_out) in enumerate(reserves):
+            if sell == buy:
+                continue
+            # Second leg sells token_out back, so the sell DEX's reserves are swapped
+            amount_with_fee = amount_out * (10000 - fees_bps[sell])
+            final_amount = amount_with_fee * reserve_in // (reserve_out * 10000 + amount_with_fee)
+            if final_amount > best_final:
+                best_buy, best_sell, best_final = buy, sell, final_amount
+                
+    return best_buy, best_sell, best_final, amounts_out
+
 @dataclass
 class ArbitrageOpportunity:
     """Represents a real arbitrage opportunity"""
@@ -49,6 +156,30 @@ class ArbitrageOpportunity:
     estimated_gas: int
     gas_cost_eth: float
 
+@dataclass(slots=True)
+class ScannerStats:
+    """Session counters of the scanner"""
+    scans_completed: int = 0
+    pairs_scanned: int = 0
+    opportunities_found: int = 0
+    immediate_executions: int = 0
+    trades_attempted: int = 0
+    trades_successful: int = 0
+    total_profit_eth: float = 0.0
+    total_gas_spent_eth: float = 0.0
+
+SESSION_STATS_FORMAT = (
+    "Session Statistics:\n"
+    "   Scans: {s.scans_completed}\n"
+    "   Pairs scanned: {s.pairs_scanned}\n"
+    "   Opportunities found: {s.opportunities_found}\n"
+    "   Immediate executions: {s.immediate_executions}\n"
+    "   Trades attempted: {s.trades_attempted}\n"
+    "   Trades successful: {s.trades_successful}\n"
+    "   Total profit: {s.total_profit_eth:.6f} BNB\n"
+    "   Total gas cost: {s.total_gas_spent_eth:.6f} BNB"
+)
+
 class TelegramBot:
     """Simple Telegram bot for notifications"""
     
@@ -57,16 +188,77 @@ class TelegramBot:
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
         self.enabled = bool(self.bot_token and self.chat_id)
         
+        # Async delivery (set up by start()) so notifications never block the scanner
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        
         if self.enabled:
             logger.info("📱 Telegram notifications enabled")
         else:
             logger.info("📱 Telegram not configured - running without notifications")
     
+    async def start(self, session: aiohttp.ClientSession):
+        """Deliver messages in the background over the shared aiohttp session"""
+        if not self.enabled or self._worker is not None:
+            return
+            
+        self._session = session
+        self._queue = asyncio.Queue(maxsize=100)  # Drop notifications rather than pile them up
+        self._worker = asyncio.create_task(self._deliver_messages())
+        
+    async def stop(self):
+        """Stop background delivery"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+        self._session = None
+        
+    async def _deliver_messages(self):
+        """Consume queued messages, coalescing bursts into a single Telegram message"""
+        while True:
+            message = await self._queue.get()
+            
+            # Telegram messages are capped at 4096 characters
+            while not self._queue.empty() and len(message) < 3000:
+                message += "\n\n" + self._queue.get_nowait()
+                
+            await self.send_message_async(message)
+            
+    async def send_message_async(self, message: str):
+        """Send message to Telegram without blocking the event loop"""
+        try:
+            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+            data = {
+                'chat_id': self.chat_id,
+                'text': message,
+                'parse_mode': 'HTML'
+            }
+            
+            async with self._session.post(url, data=data, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status != 200:
+                    logger.warning(f"Telegram message failed: {response.status}")
+                    
+        except Exception as e:
+            logger.debug(f"Telegram error: {e}")
+    
     def send_message(self, message: str):
-        """Send message to Telegram"""
+        """Send message to Telegram (queued when background delivery is running)"""
         if not self.enabled:
             return
             
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.debug("Telegram queue full - dropping message")
+            return
+            
         try:
             url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
             data = {
@@ -117,15 +309,15 @@ class TelegramBot:
                 message += f"❌ Error: {error[:100]}"
         self.send_message(message)
     
-    def send_stats_report(self, stats: dict):
+    def send_stats_report(self, stats: ScannerStats):
         """Send periodic stats report"""
         message = f"📊 <b>Scanner Statistics</b>\n\n"
-        message += f"⏱️ Scans completed: {stats['scans_completed']}\n"
-        message += f"🔍 Opportunities found: {stats['opportunities_found']}\n"
-        message += f"⚡ Immediate executions: {stats['immediate_executions']}\n"
-        message += f"📈 Trades successful: {stats['trades_successful']}\n"
-        message += f"💰 Total profit: {stats['total_profit_eth']:.6f} BNB\n"
-        message += f"⛽ Total gas cost: {stats['total_gas_spent_eth']:.6f} BNB"
+        message += f"⏱️ Scans completed: {stats.scans_completed}\n"
+        message += f"🔍 Opportunities found: {stats.opportunities_found}\n"
+        message += f"⚡ Immediate executions: {stats.immediate_executions}\n"
+        message += f"📈 Trades successful: {stats.trades_successful}\n"
+        message += f"💰 Total profit: {stats.total_profit_eth:.6f} BNB\n"
+        message += f"⛽ Total gas cost: {stats.total_gas_spent_eth:.6f} BNB"
         self.send_message(message)
 
 class ImmediateArbitrageScanner:
@@ -142,12 +334,33 @@ class ImmediateArbitrageScanner:
         self.account = self._setup_account()
         self.contract = self._setup_flashloan_contract()
         
+        # Fixed parts of every flashloan transaction, prepared once for the signing fast path
+        self._signing_key = keys.PrivateKey(self.account.key) if self.account else None
+        self._contract_raw = bytes.fromhex(self.contract.address[2:]) if self.contract else None
+        
         # Execution tracking
         self.recent_transactions = []  # Track recent transactions to avoid duplicates
         self.last_execution_time = 0
         self.min_execution_interval = 30  # Minimum 30 seconds between executions
+        self.execution_lock = asyncio.Lock()  # Concurrent pair scans share the execution throttle
+        self.scan_semaphore = asyncio.Semaphore(8)  # Max pairs quoted concurrently
         self.last_stats_report = 0
         self.stats_report_interval = 1800  # 30 minutes
+        self.stats_log_every = 10  # Log the session statistics block every N scan rounds
+        
+        # Local pending nonce, handed out under execution_lock; resynced from the node
+        # on the first execution and after any failed send
+        self._local_nonce = 0
+        self._nonce_resync_needed = True
+        
+        # Submitted transactions awaiting a receipt: tx hash -> future resolved by the per-block check
+        self._pending_receipts: Dict[str, asyncio.Future] = {}
+        self._receipt_check: Optional[asyncio.Task] = None
+        self._trade_trackers = set()
+        self._inflight_tokens: Counter = Counter()  # Borrowed token -> flashloans awaiting a receipt
+        
+        # Gas limit per (buy_router, sell_router, token_in, token_out) route, estimated on first execution
+        self._gas_estimate_cache: Dict[Tuple[str, str, str, str], int] = {}
         
         # Core high-liquidity tokens for immediate execution
         self.tokens = {
@@ -161,41 +374,121 @@ class ImmediateArbitrageScanner:
             'CAKE': '0x0E09FaBB73Bd3Ade0a17ECC321fD13a19e81cE82'
         }
         
-        # DEX Routers
+        # DEX Routers (all Uniswap V2 forks - pair init code hash and swap fee per DEX)
         self.dex_routers = {
             'PancakeSwap': {
                 'address': '0x10ED43C718714eb63d5aA57B78B54704E256024E',
-                'factory': '0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73'
+                'factory': '0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73',
+                'init_code_hash': '0x00fb7f630766e6a796048ea87d01acd3068e8ff67d078148a3fa3f4a84f69bd5',
+                'fee_bps': 25
             },
             'Biswap': {
                 'address': '0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8',
-                'factory': '0x858E3312ed3A876947EA49d572A7C42DE08af7EE'
+                'factory': '0x858E3312ed3A876947EA49d572A7C42DE08af7EE',
+                'init_code_hash': '0xfea293c909d87cd4153593f077b76bb7e94340200f4ee84211ae8e4f9bd7ffdf',
+                'fee_bps': 10
             },
             'ApeSwap': {
                 'address': '0xcF0feBd3f17CEf5b47b0cD257aCf6025c5BFf3b7',
-                'factory': '0x0841BD0B734E4F5853f0dD8d7Ea041c241fb0Da6'
+                'factory': '0x0841BD0B734E4F5853f0dD8d7Ea041c241fb0Da6',
+                'init_code_hash': '0xf4ccce374816856d11f00e4069e7cada164065686fbef53c6167a63ec2fd8c5b',
+                'fee_bps': 20
             }
         }
         
-        # Rate limiting - very conservative
-        self.last_request_time = 0
-        self.request_delay = 1.5  # 1.5 seconds between requests
+        # Raw JSON-RPC over a persistent aiohttp session (created in start())
+        self.rpc_url = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
+        # Signed transactions go out to every configured endpoint concurrently
+        self.broadcast_urls = [self.rpc_url] + [
+            url for url in (os.getenv(f'BSC_RPC_URL_{n}') for n in range(2, 5)) if url and url != self.rpc_url
+        ]
+        self._background_sends = set()
+        self.ws_url = os.getenv('BSC_WS_URL')  # Scan once per block via newHeads when set
+        self.head_timeout = 60  # Watchdog: treat the WebSocket as dead after this long without a block
+        self.min_round_interval = float(os.getenv('MIN_ROUND_INTERVAL', '1'))  # Backpressure floor between block rounds
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.rpc_id = 0
+        
+        # Index-based (structure-of-arrays) views of tokens and DEXes for the hot path.
+        # Scans work on integer indices; symbols/names are only resolved for logging.
+        self.token_symbols = list(self.tokens.keys())
+        self.token_index = {symbol: i for i, symbol in enumerate(self.token_symbols)}
+        self.token_addrs_raw = [bytes.fromhex(self.tokens[symbol][2:]) for symbol in self.token_symbols]
+        self.router_names = list(self.dex_routers.keys())
+        self.router_addrs_raw = [bytes.fromhex(self.dex_routers[name]['address'][2:]) for name in self.router_names]
+        self.router_fees = [self.dex_routers[name]['fee_bps'] for name in self.router_names]
+        
+        token_pairs = [
+            (i, j) for i in range(len(self.token_symbols)) for j in range(len(self.token_symbols)) if i != j
+        ]
+        
+        # getAmountsOut Call3 tuples only differ in amount_in, so keep one template per (dex, i, j)
+        # and splice the amount in place instead of encoding on every quote
+        self.scan_amount_in = int(1e18)  # 1 token
+        self._amounts_out_templates: Dict[Tuple[int, int, int], bytearray] = {
+            (d, i, j): bytearray(encode_aggregate3_call(
+                self.router_addrs_raw[d],
+                encode_get_amounts_out(0, self.token_addrs_raw[i], self.token_addrs_raw[j])
+            ))
+            for d in range(len(self.router_names))
+            for i, j in token_pairs
+        }
+        
+        # Pair addresses are deterministic (CREATE2), so compute them once instead of asking the factory.
+        # Each (dex, i, j) entry also records whether token i is the pair's token0 so reserves can be oriented.
+        self.pair_addresses: Dict[Tuple[int, int, int], Tuple[str, bool]] = {
+            (d, i, j): (
+                compute_v2_pair(
+                    self.dex_routers[name]['factory'],
+                    self.tokens[self.token_symbols[i]],
+                    self.tokens[self.token_symbols[j]],
+                    self.dex_routers[name]['init_code_hash']
+                ),
+                self.token_addrs_raw[i] < self.token_addrs_raw[j]
+            )
+            for d, name in enumerate(self.router_names)
+            for i, j in token_pairs
+        }
+        
+        # Flashloans are always taken from the PancakeSwap pair
+        self.flashloan_dex = self.router_names.index('PancakeSwap')
+        
+        # getReserves() Call3 tuples are fully static per pair
+        self._reserves_calls: Dict[str, bytes] = {
+            pair: encode_aggregate3_call(bytes.fromhex(pair[2:]), GET_RESERVES_SELECTOR)
+            for pair, _ in self.pair_addresses.values()
+        }
+        
+        # Flashloan pairs confirmed by the factory's getPair(), keyed "token0,token1" (lowercase)
+        self.pair_cache: Dict[str, str] = self._load_pair_cache()
+        for i, j in token_pairs:
+            cached_pair = self.pair_cache.get(self._pair_key(i, j))
+            if cached_pair:
+                self._use_flashloan_pair(i, j, cached_pair)
+        
+        # Reserves only change between blocks: cache (block, pair) -> (reserve0, reserve1)
+        self.current_block = 0
+        self.scan_count = 0
+        self._reserves_cache: Dict[Tuple[int, str], Optional[Tuple[int, int]]] = {}
+        
+        # Last fetched reserves per token pair (i, j) -> (block, dexes, reserves), used to skip
+        # pairs that showed no opportunity recently; refetched at least every N blocks regardless
+        self._last_reserves: Dict[Tuple[int, int], Tuple[int, List[int], List[Tuple[int, int]]]] = {}
+        self.reserves_refresh_blocks = int(os.getenv('RESERVES_REFRESH_BLOCKS', '20'))
+        
+        # EWMA of recent profit per token pair (i, j) - pairs that have paid off are quoted first
+        self._pair_scores: Dict[Tuple[int, int], float] = {}
         
         # Configuration
         self.min_profit_threshold = float(os.getenv('MIN_PROFIT_THRESHOLD', '0.005'))  # 0.5%
         self.immediate_execution_threshold = 0.02  # 2% - execute immediately
         
+        # Thresholds in basis points so profit checks stay in exact integer math
+        self._min_profit_bps = round(self.min_profit_threshold * 10000)
+        self._immediate_execution_bps = round(self.immediate_execution_threshold * 10000)
+        
         # Statistics
-        self.stats = {
-            'scans_completed': 0,
-            'pairs_scanned': 0,
-            'opportunities_found': 0,
-            'immediate_executions': 0,
-            'trades_attempted': 0,
-            'trades_successful': 0,
-            'total_profit_eth': 0.0,
-            'total_gas_spent_eth': 0.0
-        }
+        self.stats = ScannerStats()
         
         logger.info("Immediate Execution BSC Arbitrage Scanner initialized")
         logger.info(f"Min profit threshold: {self.min_profit_threshold:.1%}")
@@ -205,7 +498,18 @@ class ImmediateArbitrageScanner:
         """Setup Web3 connection to BSC"""
         rpc_url = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
         
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        # Pooled keep-alive session so web3 calls reuse warm TLS connections
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.1, allowed_methods=None)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        
+        w3 = Web3(Web3.HTTPProvider(rpc_url, session=session, request_kwargs={'timeout': 10}))
         
         if not w3.is_connected():
             raise ConnectionError(f"Failed to connect to BSC at {rpc_url}")
@@ -333,244 +637,400 @@ class ImmediateArbitrageScanner:
             logger.info("Running in simulation mode")
             return None
         
-    def _rate_limit(self):
-        """Apply rate limiting between requests"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+    def _pair_key(self, i: int, j: int) -> str:
+        """Order-independent pair_cache key for token pair (i, j)"""
+        return ','.join(sorted((self.tokens[self.token_symbols[i]].lower(), self.tokens[self.token_symbols[j]].lower())))
         
-        if time_since_last < self.request_delay:
-            sleep_time = self.request_delay - time_since_last
-            time.sleep(sleep_time)
+    def _use_flashloan_pair(self, i: int, j: int, pair: str):
+        """Use a factory-confirmed pair address for flashloans on token pair (i, j)"""
+        self.pair_addresses[(self.flashloan_dex, i, j)] = (pair, self.token_addrs_raw[i] < self.token_addrs_raw[j])
+        self.pair_addresses[(self.flashloan_dex, j, i)] = (pair, self.token_addrs_raw[j] < self.token_addrs_raw[i])
+        if pair not in self._reserves_calls:
+            self._reserves_calls[pair] = encode_aggregate3_call(bytes.fromhex(pair[2:]), GET_RESERVES_SELECTOR)
             
-        self.last_request_time = time.time()
-        
-    def _get_amounts_out(self, router_address: str, amount_in: int, path: List[str]) -> Optional[List[int]]:
-        """Get amounts out with rate limiting"""
-        self._rate_limit()
-        
+    def _load_pair_cache(self) -> Dict[str, str]:
+        """Load factory-confirmed pair addresses from disk"""
+        try:
+            with open(PAIR_CACHE_FILE, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable pair cache {PAIR_CACHE_FILE}: {e}")
+            return {}
+            
+    def _save_pair_cache(self):
+        """Persist factory-confirmed pair addresses"""
         try:
-            # Router ABI for getAmountsOut
-            router_abi = [
-                {
-                    "inputs": [
-                        {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                        {"internalType": "address[]", "name": "path", "type": "address[]"}
-                    ],
-                    "name": "getAmountsOut",
-                    "outputs": [{"internalType": "uint256[]", "name": "amounts", "type": "uint256[]"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]
-            
-            router_contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(router_address),
-                abi=router_abi
+            with open(PAIR_CACHE_FILE, 'w') as f:
+                json.dump(self.pair_cache, f, indent=2, sort_keys=True)
+        except Exception as e:
+            logger.warning(f"Could not save pair cache: {e}")
+            
+    async def _verify_flashloan_pairs(self):
+        """Confirm uncached flashloan pairs with the factory's getPair() in one multicall"""
+        unverified = [
+            (i, j) for i in range(len(self.token_symbols)) for j in range(i + 1, len(self.token_symbols))
+            if self._pair_key(i, j) not in self.pair_cache
+        ]
+        if not unverified:
+            return
+            
+        factory = bytes.fromhex(self.dex_routers[self.router_names[self.flashloan_dex]]['factory'][2:])
+        results = await self._multicall([
+            encode_aggregate3_call(factory, encode_get_pair(self.token_addrs_raw[i], self.token_addrs_raw[j]))
+            for i, j in unverified
+        ])
+        if results is None:
+            return  # RPC failure - try again next start
+            
+        for (i, j), result in zip(unverified, results):
+            if not result or len(result) < 32 or not any(result[12:32]):
+                continue  # Lookup failed or no pair deployed - try again next start
+                
+            pair = Web3.to_checksum_address(result[12:32])
+            if pair != self.pair_addresses[(self.flashloan_dex, i, j)][0]:
+                logger.warning(f"Factory pair {pair} for {self.token_symbols[i]}/{self.token_symbols[j]} differs from computed address")
+                self._use_flashloan_pair(i, j, pair)
+            self.pair_cache[self._pair_key(i, j)] = pair
+            
+        self._save_pair_cache()
+        
+    async def start(self):
+        """Open the persistent RPC session"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=60),
+                json_serialize=_json_dumps
             )
+        await self.telegram.start(self.session)
+        await self._verify_flashloan_pairs()
+            
+    async def close(self):
+        """Close the RPC session"""
+        await self.telegram.stop()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            
+    async def _rpc(self, method: str, params: list, url: Optional[str] = None):
+        """Send a single JSON-RPC request over the shared session"""
+        self.rpc_id += 1
+        payload = {'jsonrpc': '2.0', 'id': self.rpc_id, 'method': method, 'params': params}
+        
+        async with self.session.post(url or self.rpc_url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            data = _json_loads(await response.read())
+            
+        if 'error' in data:
+            raise RuntimeError(f"RPC error in {method}: {data['error']}")
+        return data['result']
+        
+    async def _broadcast_raw_transaction(self, raw_tx: str) -> str:
+        """Send a signed transaction to every broadcast endpoint at once, returning on the first accept"""
+        pending = {asyncio.create_task(self._rpc('eth_sendRawTransaction', [raw_tx], url)) for url in self.broadcast_urls}
+        first_error: Optional[BaseException] = None
+        
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    # The remaining sends keep running in the background to help propagation
+                    self._background_sends.update(pending)
+                    for other in pending:
+                        other.add_done_callback(self._background_sends.discard)
+                        other.add_done_callback(lambda t: t.cancelled() or t.exception())
+                    return task.result()
+                first_error = first_error or task.exception()
+                
+        raise first_error
+        
+    async def _rpc_batch(self, calls: List[Tuple[str, list]]) -> list:
+        """Send several JSON-RPC requests in one HTTP round-trip, returning results in call order"""
+        first_id = self.rpc_id + 1
+        self.rpc_id += len(calls)
+        payload = [
+            {'jsonrpc': '2.0', 'id': first_id + n, 'method': method, 'params': params}
+            for n, (method, params) in enumerate(calls)
+        ]
+        
+        async with self.session.post(self.rpc_url, json=payload, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            response.raise_for_status()
+            data = _json_loads(await response.read())
             
-            # Convert path to checksum addresses
-            checksum_path = [Web3.to_checksum_address(addr) for addr in path]
+        if not isinstance(data, list):
+            raise RuntimeError(f"RPC batch rejected: {data.get('error', data)}")
             
-            amounts = router_contract.functions.getAmountsOut(amount_in, checksum_path).call()
-            return amounts
+        # Batch responses may come back in any order
+        results = {item.get('id'): item for item in data}
+        ordered = []
+        for n, (method, _) in enumerate(calls):
+            item = results.get(first_id + n)
+            if item is None or 'error' in item:
+                raise RuntimeError(f"RPC error in {method}: {item['error'] if item else 'missing response'}")
+            ordered.append(item['result'])
+        return ordered
+        
+    async def _multicall(self, calls: List[bytes]) -> Optional[List[Optional[bytes]]]:
+        """Run several encoded Call3 tuples in one Multicall3 aggregate3 eth_call (None if the eth_call itself failed)"""
+        if not calls:
+            return []
             
+        data = encode_aggregate3(calls)
+        
+        try:
+            result = await self._rpc('eth_call', [{'to': MULTICALL3_ADDRESS, 'data': '0x' + data.hex()}, 'latest'])
+            decoded = decode(['(bool,bytes)[]'], bytes.fromhex(result[2:]))[0]
+            return [return_data if success else None for success, return_data in decoded]
         except Exception as e:
-            logger.debug(f"Error getting amounts out from {router_address}: {e}")
+            logger.debug("Error in multicall: %s", e)
             return None
             
-    def _scan_pair_and_execute_immediately(self, token_in_symbol: str, token_out_symbol: str, amount_in: int) -> bool:
-        """Scan a pair and execute immediately if profitable"""
-        token_in = self.tokens[token_in_symbol]
-        token_out = self.tokens[token_out_symbol]
-        path = [token_in, token_out]
+    def _get_amounts_out_call(self, d: int, i: int, j: int, amount_in: int) -> bytes:
+        """Splice amount_in into the cached getAmountsOut Call3 template"""
+        template = self._amounts_out_templates[(d, i, j)]
+        template[_CALL3_AMOUNT_IN_OFFSET:_CALL3_AMOUNT_IN_OFFSET + 32] = amount_in.to_bytes(32, 'big')
+        return bytes(template)
         
-        logger.info(f"Scanning {token_in_symbol}/{token_out_symbol}")
+    async def _multicall_get_amounts_out(self, quotes: List[Tuple[int, int, int, int]]) -> List[Optional[List[int]]]:
+        """Get amounts out for several (dex, token_in, token_out, amount_in) index quotes in one multicall"""
+        results = await self._multicall([
+            self._get_amounts_out_call(d, i, j, amount_in) for d, i, j, amount_in in quotes
+        ])
+        if results is None:
+            return [None] * len(quotes)
+            
+        amounts: List[Optional[List[int]]] = []
+        for router_result in results:
+            try:
+                amounts.append(list(decode(['uint256[]'], router_result)[0]) if router_result else None)
+            except Exception as e:
+                logger.debug("Error decoding amounts out: %s", e)
+                amounts.append(None)
+        return amounts
+            
+    async def _update_block_number(self):
+        """Poll the latest block number"""
+        self._set_block(int(await self._rpc('eth_blockNumber', []), 16))
         
-        # Get prices from all DEXes
-        dex_prices = {}
+    def _set_block(self, block: int):
+        """Track the latest block and drop reserves cached for older blocks"""
+        if block != self.current_block:
+            self.current_block = block
+            self._reserves_cache = {
+                key: value for key, value in self._reserves_cache.items() if key[0] >= block
+            }
+            
+            # Look for receipts of submitted trades once per block, without holding up the scan
+            if self._pending_receipts and (self._receipt_check is None or self._receipt_check.done()):
+                self._receipt_check = asyncio.create_task(self._check_pending_receipts())
+                
+    async def _check_pending_receipts(self):
+        """Fetch receipts of all pending transactions in one batch and resolve their futures"""
+        tx_hashes = list(self._pending_receipts)
+        try:
+            receipts = await self._rpc_batch([('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes])
+        except Exception as e:
+            logger.debug("Error fetching receipts: %s", e)
+            return
+            
+        for tx_hash, receipt in zip(tx_hashes, receipts):
+            if receipt is None:
+                continue
+            future = self._pending_receipts.pop(tx_hash, None)
+            if future is not None and not future.done():
+                future.set_result(receipt)
+            
+    async def _fetch_reserves(self, pairs: List[str]):
+        """Read reserves of all pair addresses not yet cached for this block in one multicall"""
+        block = self.current_block
         
-        for dex_name, dex_info in self.dex_routers.items():
-            amounts = self._get_amounts_out(dex_info['address'], amount_in, path)
+        # Only ask the chain for pairs not already read in this block
+        missing = list(dict.fromkeys(pair for pair in pairs if (block, pair) not in self._reserves_cache))
+        if not missing:
+            return
+            
+        results = await self._multicall([self._reserves_calls[pair] for pair in missing])
+        if results is None:
+            return  # RPC failure - cache nothing, so the pairs are read again instead of looking undeployed
             
-            if amounts and len(amounts) >= 2:
-                amount_out = amounts[-1]
-                price = float(amount_out) / float(amount_in)
-                dex_prices[dex_name] = {
-                    'price': price,
-                    'amount_out': amount_out
-                }
-                logger.debug(f"  {dex_name}: {price:.6f}")
+        for pair, result in zip(missing, results):
+            # Missing pairs have no code, so the call "succeeds" with empty return data
+            if not result or len(result) < 64:
+                self._reserves_cache[(block, pair)] = None
+                continue
+            self._reserves_cache[(block, pair)] = (
+                int.from_bytes(result[0:32], 'big'),
+                int.from_bytes(result[32:64], 'big')
+            )
+            
+    async def _get_reserves(self, i: int, j: int) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """Get (reserve_in, reserve_out) of token pair (i, j) on every DEX"""
+        block = self.current_block
+        pairs = [self.pair_addresses[(d, i, j)] for d in range(len(self.router_names))]
+        await self._fetch_reserves([pair for pair, _ in pairs])
+        
+        # Parallel lists: DEX indices with liquidity and their oriented reserves
+        dexes: List[int] = []
+        reserves: List[Tuple[int, int]] = []
+        for d, (pair, in_is_token0) in enumerate(pairs):
+            cached = self._reserves_cache.get((block, pair))
+            if not cached or cached[0] == 0 or cached[1] == 0:
+                continue
+            dexes.append(d)
+            reserves.append(cached if in_is_token0 else (cached[1], cached[0]))
+        return dexes, reserves
+        
+    async def _confirm_route(self, i: int, j: int, buy: int, sell: int, amount_in: int) -> Optional[Tuple[int, int]]:
+        """Re-quote a route with the routers' own getAmountsOut before executing it"""
+        forward = (await self._multicall_get_amounts_out([(buy, i, j, amount_in)]))[0]
+        if not forward or len(forward) < 2:
+            return None
+            
+        reverse = (await self._multicall_get_amounts_out([(sell, j, i, forward[-1])]))[0]
+        if not reverse or len(reverse) < 2:
+            return None
+            
+        return forward[-1], reverse[-1]
+        
+    def _predicts_no_profit(self, i: int, j: int, amount_in: int) -> bool:
+        """Check recent reserves of token pair (i, j) to skip pairs that can't be profitable"""
+        last = self._last_reserves.get((i, j))
+        if last is None or self.current_block - last[0] >= self.reserves_refresh_blocks:
+            return False
+            
+        _, dexes, reserves = last
+        if len(dexes) < 2:
+            return True
+            
+        _, _, final_amount, _ = best_round_trip(amount_in, reserves, [self.router_fees[d] for d in dexes])
+        real_profit = final_amount - self._flashloan_repayment(amount_in)
+        return real_profit * 10000 <= self._min_profit_bps * amount_in
+        
+    async def _scan_pair_async(self, i: int, j: int, amount_in: int) -> Optional[ArbitrageOpportunity]:
+        """Scan token pair (i, j) for an opportunity worth executing immediately"""
+        if self._predicts_no_profit(i, j, amount_in):
+            return None
+            
+        async with self.scan_semaphore:
+            return await self._scan_pair(i, j, amount_in)
+            
+    async def _scan_pair(self, i: int, j: int, amount_in: int) -> Optional[ArbitrageOpportunity]:
+        """Quote token pair (i, j) on all DEXes and confirm the best round-trip route"""
+        logger.info("Scanning %s/%s", self.token_symbols[i], self.token_symbols[j])
+        
+        # Get reserves from all DEXes in a single multicall and quote both legs locally
+        dexes, reserves = await self._get_reserves(i, j)
+        self._last_reserves[(i, j)] = (self.current_block, dexes, reserves)
         
         # Find arbitrage opportunities
-        if len(dex_prices) >= 2:
-            dex_names = list(dex_prices.keys())
+        if len(dexes) < 2:
+            return None
             
-            for i in range(len(dex_names)):
-                for j in range(i + 1, len(dex_names)):
-                    dex_buy = dex_names[i]
-                    dex_sell = dex_names[j]
-                    
-                    price_buy = dex_prices[dex_buy]['price']
-                    price_sell = dex_prices[dex_sell]['price']
-                    
-                    # Check both directions with REAL arbitrage profit calculation
-                    
-                    # Direction 1: Start with token_in, buy token_out on dex_buy, sell back on dex_sell
-                    if dex_buy in dex_prices and dex_sell in dex_prices:
-                        # Calculate round-trip: token_in -> token_out (on dex_buy) -> token_in (on dex_sell)
-                        amount_out_step1 = dex_prices[dex_buy]['amount_out']  # token_out from dex_buy
-                        
-                        # Get reverse path amounts (token_out -> token_in on dex_sell)
-                        reverse_path = [token_out, token_in]
-                        reverse_amounts = self._get_amounts_out(
-                            self.dex_routers[dex_sell]['address'], 
-                            amount_out_step1, 
-                            reverse_path
-                        )
-                        
-                        if reverse_amounts and len(reverse_amounts) >= 2:
-                            final_amount = reverse_amounts[-1]
-                            
-                            # Calculate real arbitrage profit (including 0.3% flashloan fee)
-                            flashloan_fee = (amount_in * 3) // 1000
-                            amount_needed = amount_in + flashloan_fee
-                            
-                            real_profit = final_amount - amount_needed
-                            real_profit_percentage = (real_profit / amount_in) if real_profit > 0 else 0
-                            
-                            if real_profit > 0 and real_profit_percentage > self.min_profit_threshold:
-                                opportunity = ArbitrageOpportunity(
-                                    token_in=token_in,
-                                    token_out=token_out,
-                                    token_in_symbol=token_in_symbol,
-                                    token_out_symbol=token_out_symbol,
-                                    amount_in=amount_in,
-                                    dex_buy=dex_buy,  # Where to buy token_out with token_in
-                                    dex_sell=dex_sell,  # Where to sell token_out back to token_in
-                                    price_buy=dex_prices[dex_buy]['price'],
-                                    price_sell=dex_prices[dex_sell]['price'],
-                                    amount_out_buy=amount_out_step1,
-                                    amount_out_sell=final_amount,
-                                    profit_percentage=real_profit_percentage,
-                                    estimated_gas=200000,
-                                    gas_cost_eth=0.002
-                                )
-                                
-                                logger.info(f"[FOUND] {token_in_symbol}/{token_out_symbol}: {real_profit_percentage:.2%} REAL profit")
-                                logger.info(f"        Route: {token_in_symbol} -> {token_out_symbol} on {dex_buy} -> {token_in_symbol} on {dex_sell}")
-                                logger.info(f"        After fees: {real_profit / 1e18:.6f} {token_in_symbol}")
-                                
-                                self.stats['opportunities_found'] += 1
-                                
-                                # IMMEDIATE EXECUTION for high-profit opportunities
-                                if real_profit_percentage >= self.immediate_execution_threshold:
-                                    # Send Telegram notification for opportunity
-                                    self.telegram.send_opportunity_found(opportunity)
-                                    
-                                    # Check if enough time has passed since last execution
-                                    current_time = time.time()
-                                    if current_time - self.last_execution_time < self.min_execution_interval:
-                                        logger.info(f"[THROTTLED] Waiting {self.min_execution_interval}s between executions")
-                                        continue
-                                    
-                                    logger.info(f"[IMMEDIATE] High profit {real_profit_percentage:.2%} - EXECUTING NOW!")
-                                    self.stats['immediate_executions'] += 1
-                                    success = self.execute_arbitrage_trade(opportunity)
-                                    
-                                    # Send execution result notification
-                                    if success:
-                                        logger.info(f"[SUCCESS] Immediate execution successful!")
-                                        self.telegram.send_execution_result(opportunity, True)
-                                        self.last_execution_time = current_time
-                                        return True
-                                    else:
-                                        logger.warning(f"[FAILED] Immediate execution failed")
-                                        self.telegram.send_execution_result(opportunity, False, error="Execution failed")
-                                else:
-                                    logger.info(f"[QUEUED] Profit {real_profit_percentage:.2%} below immediate threshold {self.immediate_execution_threshold:.1%}")
-                    
-                    # Direction 2: Test reverse direction (swap the DEXes)
-                    if dex_sell in dex_prices and dex_buy in dex_prices:
-                        # Calculate round-trip: token_in -> token_out (on dex_sell) -> token_in (on dex_buy)
-                        amount_out_step1 = dex_prices[dex_sell]['amount_out']  # token_out from dex_sell
-                        
-                        # Get reverse path amounts (token_out -> token_in on dex_buy)
-                        reverse_path = [token_out, token_in]
-                        reverse_amounts = self._get_amounts_out(
-                            self.dex_routers[dex_buy]['address'], 
-                            amount_out_step1, 
-                            reverse_path
-                        )
-                        
-                        if reverse_amounts and len(reverse_amounts) >= 2:
-                            final_amount = reverse_amounts[-1]
-                            
-                            # Calculate real arbitrage profit (including 0.3% flashloan fee)
-                            flashloan_fee = (amount_in * 3) // 1000
-                            amount_needed = amount_in + flashloan_fee
-                            
-                            real_profit = final_amount - amount_needed
-                            real_profit_percentage = (real_profit / amount_in) if real_profit > 0 else 0
-                            
-                            if real_profit > 0 and real_profit_percentage > self.min_profit_threshold:
-                                opportunity = ArbitrageOpportunity(
-                                    token_in=token_in,
-                                    token_out=token_out,
-                                    token_in_symbol=token_in_symbol,
-                                    token_out_symbol=token_out_symbol,
-                                    amount_in=amount_in,
-                                    dex_buy=dex_sell,  # Reversed: Where to buy token_out with token_in
-                                    dex_sell=dex_buy,  # Reversed: Where to sell token_out back to token_in  
-                                    price_buy=dex_prices[dex_sell]['price'],
-                                    price_sell=dex_prices[dex_buy]['price'],
-                                    amount_out_buy=amount_out_step1,
-                                    amount_out_sell=final_amount,
-                                    profit_percentage=real_profit_percentage,
-                                    estimated_gas=200000,
-                                    gas_cost_eth=0.002
-                                )
-                                
-                                logger.info(f"[FOUND] {token_in_symbol}/{token_out_symbol}: {real_profit_percentage:.2%} REAL profit (reverse)")
-                                logger.info(f"        Route: {token_in_symbol} -> {token_out_symbol} on {dex_sell} -> {token_in_symbol} on {dex_buy}")
-                                logger.info(f"        After fees: {real_profit / 1e18:.6f} {token_in_symbol}")
-                                
-                                self.stats['opportunities_found'] += 1
-                                
-                                # IMMEDIATE EXECUTION for high-profit opportunities
-                                if real_profit_percentage >= self.immediate_execution_threshold:
-                                    # Send Telegram notification for opportunity
-                                    self.telegram.send_opportunity_found(opportunity)
-                                    
-                                    # Check if enough time has passed since last execution
-                                    current_time = time.time()
-                                    if current_time - self.last_execution_time < self.min_execution_interval:
-                                        logger.info(f"[THROTTLED] Waiting {self.min_execution_interval}s between executions")
-                                        continue
-                                    
-                                    logger.info(f"[IMMEDIATE] High profit {real_profit_percentage:.2%} - EXECUTING NOW!")
-                                    self.stats['immediate_executions'] += 1
-                                    success = self.execute_arbitrage_trade(opportunity)
-                                    
-                                    # Send execution result notification
-                                    if success:
-                                        logger.info(f"[SUCCESS] Immediate execution successful!")
-                                        self.telegram.send_execution_result(opportunity, True)
-                                        self.last_execution_time = current_time
-                                        return True
-                                    else:
-                                        logger.warning(f"[FAILED] Immediate execution failed")
-                                        self.telegram.send_execution_result(opportunity, False, error="Execution failed")
-                                else:
-                                    logger.info(f"[QUEUED] Profit {real_profit_percentage:.2%} below immediate threshold {self.immediate_execution_threshold:.1%}")
-        
-        return False
-            
-    def execute_arbitrage_trade(self, opportunity: ArbitrageOpportunity) -> bool:
+        # Best round trip across all (buy, sell) DEX combinations
+        buy, sell, final_amount, amounts_out = best_round_trip(
+            amount_in, reserves, [self.router_fees[d] for d in dexes]
+        )
+        if final_amount == 0:
+            return None
+            
+        opportunity = self._evaluate_route(
+            i, j, dexes[buy], dexes[sell], amount_in, amounts_out[buy], amounts_out[sell], final_amount
+        )
+        if opportunity is None:
+            return None
+            
+        amount_needed = self._flashloan_repayment(amount_in)
+        
+        # IMMEDIATE EXECUTION for high-profit opportunities
+        if (opportunity.amount_out_sell - amount_needed) * 10000 < self._immediate_execution_bps * amount_in:
+            logger.info("[QUEUED] Profit %.2f%% below immediate threshold %.1f%%",
+                        opportunity.profit_percentage * 100, self.immediate_execution_threshold * 100)
+            return None
+            
+        # Reserves math is only a screen - confirm with the routers (fees can differ per pair)
+        confirmed = await self._confirm_route(i, j, dexes[buy], dexes[sell], amount_in)
+        if not confirmed or (confirmed[1] - amount_needed) * 10000 < self._immediate_execution_bps * amount_in:
+            logger.info("[STALE] Router quotes no longer confirm %s/%s route above %.1f%%",
+                        self.token_symbols[i], self.token_symbols[j], self.immediate_execution_threshold * 100)
+            return None
+        opportunity.amount_out_buy, opportunity.amount_out_sell = confirmed
+        opportunity.profit_percentage = (confirmed[1] - amount_needed) / amount_in
+        
+        # Send Telegram notification for opportunity
+        self.telegram.send_opportunity_found(opportunity)
+        return opportunity
+        
+    async def _execute_immediately(self, opportunity: ArbitrageOpportunity) -> bool:
+        """Execute a confirmed opportunity unless an execution happened too recently"""
+        async with self.execution_lock:
+            # Check if enough time has passed since last execution
+            current_time = time.time()
+            if current_time - self.last_execution_time < self.min_execution_interval:
+                logger.info("[THROTTLED] Waiting %ss between executions", self.min_execution_interval)
+                return False
+                
+            logger.info("[IMMEDIATE] High profit %.2f%% - EXECUTING NOW!", opportunity.profit_percentage * 100)
+            self.stats.immediate_executions += 1
+            success = await self.execute_arbitrage_trade(opportunity)
+            
+            # The execution result is reported once the receipt arrives; only failed submissions here
+            if success:
+                logger.info("[SUCCESS] Immediate execution submitted!")
+                self.last_execution_time = current_time
+                return True
+            else:
+                logger.warning("[FAILED] Immediate execution failed")
+                self.telegram.send_execution_result(opportunity, False, error="Execution failed")
+                return False
+                
+    def _flashloan_repayment(self, amount_in: int) -> int:
+        """Amount owed back to the flashloan pair (principal + 0.3% fee)"""
+        return amount_in + (amount_in * 3) // 1000
+        
+    def _evaluate_route(self, i: int, j: int, buy: int, sell: int, amount_in: int,
+                        amount_out_buy: int, amount_out_sell_dex: int, final_amount: int) -> Optional[ArbitrageOpportunity]:
+        """Turn a round-trip quote into an opportunity if it clears the profit threshold"""
+        real_profit = final_amount - self._flashloan_repayment(amount_in)
+        
+        if real_profit <= 0 or real_profit * 10000 <= self._min_profit_bps * amount_in:
+            return None
+            
+        # Floats and names only from here on - for logging and notifications
+        real_profit_percentage = real_profit / amount_in
+        token_in_symbol, token_out_symbol = self.token_symbols[i], self.token_symbols[j]
+        dex_buy, dex_sell = self.router_names[buy], self.router_names[sell]
+        opportunity = ArbitrageOpportunity(
+            token_in=self.tokens[token_in_symbol],
+            token_out=self.tokens[token_out_symbol],
+            token_in_symbol=token_in_symbol,
+            token_out_symbol=token_out_symbol,
+            amount_in=amount_in,
+            dex_buy=dex_buy,  # Where to buy token_out with token_in
+            dex_sell=dex_sell,  # Where to sell token_out back to token_in
+            price_buy=amount_out_buy / amount_in,
+            price_sell=amount_out_sell_dex / amount_in,
+            amount_out_buy=amount_out_buy,
+            amount_out_sell=final_amount,
+            profit_percentage=real_profit_percentage,
+            estimated_gas=200000,
+            gas_cost_eth=0.002
+        )
+        
+        logger.info("[FOUND] %s/%s: %.2f%% REAL profit", token_in_symbol, token_out_symbol, real_profit_percentage * 100)
+        logger.info("        Route: %s -> %s on %s -> %s on %s", token_in_symbol, token_out_symbol, dex_buy, token_in_symbol, dex_sell)
+        logger.info("        After fees: %.6f %s", real_profit / 1e18, token_in_symbol)
+        
+        self.stats.opportunities_found += 1
+        return opportunity
+            
+    async def execute_arbitrage_trade(self, opportunity: ArbitrageOpportunity) -> bool:
         """Execute arbitrage trade using new BSC V2 contract with flashloans"""
         if not self.account or not self.contract:
             logger.info(f"[SIMULATION] Would execute arbitrage for {opportunity.token_in_symbol}/{opportunity.token_out_symbol}")
             logger.info(f"[SIMULATION] Buy on {opportunity.dex_buy}, sell on {opportunity.dex_sell}")
             logger.info(f"[SIMULATION] Expected profit: {opportunity.profit_percentage:.2%}")
+            self.telegram.send_execution_result(opportunity, True)
             return True
             
         try:
@@ -584,65 +1044,26 @@ class ImmediateArbitrageScanner:
             sell_router = self.dex_routers[opportunity.dex_buy]['address']   # Lower price DEX for selling back
             buy_router = self.dex_routers[opportunity.dex_sell]['address']   # Higher price DEX for buying
             
-            # Get pair address directly from PancakeSwap factory (the contract calculation is wrong)
-            try:
-                factory_abi = [
-                    {
-                        "inputs": [
-                            {"internalType": "address", "name": "tokenA", "type": "address"},
-                            {"internalType": "address", "name": "tokenB", "type": "address"}
-                        ],
-                        "name": "getPair",
-                        "outputs": [{"internalType": "address", "name": "pair", "type": "address"}],
-                        "stateMutability": "view",
-                        "type": "function"
-                    }
-                ]
-                
-                factory_address = '0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73'  # PancakeSwap Factory
-                factory_contract = self.w3.eth.contract(
-                    address=Web3.to_checksum_address(factory_address),
-                    abi=factory_abi
-                )
-                
-                pair_address = factory_contract.functions.getPair(
-                    opportunity.token_in, 
-                    opportunity.token_out
-                ).call()
-                
-                if pair_address == '0x0000000000000000000000000000000000000000':
-                    logger.error(f"[ERROR] No PancakeSwap pair exists for {opportunity.token_in_symbol}/{opportunity.token_out_symbol}")
-                    return False
-                    
-                logger.info(f"[TX] Using real PancakeSwap pair: {pair_address}")
-            except Exception as e:
-                logger.error(f"[ERROR] Failed to get pair address from factory: {e}")
+            # Flashloan from the PancakeSwap pair - computed offchain and confirmed by the factory
+            # once at startup (the contract calculation is wrong and getPair() costs a round-trip here)
+            pair_address, borrow_is_token0 = self.pair_addresses[(
+                self.flashloan_dex,
+                self.token_index[opportunity.token_in_symbol],
+                self.token_index[opportunity.token_out_symbol]
+            )]
+
+            # The scan already read this pair's reserves - no reserves means no pair deployed
+            if not self._reserves_cache.get((self.current_block, pair_address)):
+                logger.error(f"[ERROR] No PancakeSwap pair exists for {opportunity.token_in_symbol}/{opportunity.token_out_symbol}")
                 return False
+
+            logger.info(f"[TX] Using PancakeSwap pair: {pair_address}")
             
             # Determine which token to borrow (amount0Out or amount1Out)
-            # For BUSD/USDC, we want to borrow BUSD first
-            amount0Out = opportunity.amount_in if opportunity.token_in < opportunity.token_out else 0
-            amount1Out = opportunity.amount_in if opportunity.token_in >= opportunity.token_out else 0
-            
-            # Get current gas price and fresh nonce
-            gas_price = self.w3.eth.gas_price
-            nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
-            
-            logger.info(f"[TX] Gas price: {self.w3.from_wei(gas_price, 'gwei')} gwei")
-            logger.info(f"[TX] Using nonce: {nonce}")
-            logger.info(f"[TX] Pair: {pair_address}")
-            logger.info(f"[TX] Amount0Out: {amount0Out}")
-            logger.info(f"[TX] Amount1Out: {amount1Out}")
-            logger.info(f"[TX] TokenBorrow: {opportunity.token_in}")
-            logger.info(f"[TX] TokenTarget: {opportunity.token_out}")
-            logger.info(f"[TX] Buy Router: {buy_router}")
-            logger.info(f"[TX] Sell Router: {sell_router}")
-            
-            # Increased gas limit for flashloan
-            gas_limit = 500000
-            
-            # Build transaction using new flashloan contract interface
-            transaction = self.contract.functions.executeFlashloan(
+            amount0Out = opportunity.amount_in if borrow_is_token0 else 0
+            amount1Out = 0 if borrow_is_token0 else opportunity.amount_in
+            
+            data = encode_execute_flashloan(
                 pair_address,           # pairAddress
                 amount0Out,            # amount0Out
                 amount1Out,            # amount1Out
@@ -650,65 +1071,233 @@ class ImmediateArbitrageScanner:
                 opportunity.token_out,  # tokenTarget
                 buy_router,            # buyRouter
                 sell_router            # sellRouter
-            ).build_transaction({
-                'from': self.account.address,
-                'gas': gas_limit,
-                'gasPrice': gas_price,
-                'nonce': nonce
-            })
-            
-            # Calculate gas cost
-            gas_cost_wei = transaction['gas'] * transaction['gasPrice']
-            gas_cost_eth = self.w3.from_wei(gas_cost_wei, 'ether')
-            
-            logger.info(f"[TX] Estimated gas cost: {gas_cost_eth:.6f} BNB")
-            
-            # Sign and send transaction
-            signed_txn = self.w3.eth.account.sign_transaction(transaction, self.account.key)
-            # Fix for newer Web3.py versions - use rawTransaction instead of raw_transaction
-            raw_tx = getattr(signed_txn, 'rawTransaction', getattr(signed_txn, 'raw_transaction', None))
-            if raw_tx is None:
-                raise Exception("Cannot access raw transaction data")
-            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
-            
-            logger.info(f"[TX] Transaction sent: {tx_hash.hex()}")
-            
-            # Wait for confirmation
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            
-            if receipt.status == 1:
-                actual_gas_used = receipt.gasUsed
-                actual_gas_cost = self.w3.from_wei(actual_gas_used * gas_price, 'ether')
-                
-                logger.info(f"[SUCCESS] Flashloan arbitrage successful!")
-                logger.info(f"[SUCCESS] Profit: {opportunity.profit_percentage:.2%}")
-                logger.info(f"[SUCCESS] Gas used: {actual_gas_used}")
-                logger.info(f"[SUCCESS] Gas cost: {actual_gas_cost:.6f} BNB")
-                
-                self.stats['trades_successful'] += 1
-                self.stats['total_profit_eth'] += opportunity.profit_percentage * 0.1  # Estimate
-                self.stats['total_gas_spent_eth'] += float(actual_gas_cost)
-                
-                return True
-            else:
-                logger.warning(f"[FAILED] Transaction failed with status: {receipt.status}")
-                logger.warning(f"[DEBUG] Gas used: {receipt.gasUsed}")
-                return False
+            )
+            
+            # Get current gas price - plus a fresh nonce when resyncing and a gas estimate the first
+            # time this route executes - in a single batched round-trip
+            route = (buy_router, sell_router, opportunity.token_in, opportunity.token_out)
+            gas_limit = self._gas_estimate_cache.get(route)
+            calls = [('eth_gasPrice', [])]
+            if self._nonce_resync_needed:
+                calls.append(('eth_getTransactionCount', [self.account.address, 'pending']))
+            if gas_limit is None:
+                calls.append(('eth_estimateGas', [{
+                    'from': self.account.address, 'to': self.contract.address, 'data': '0x' + data.hex()
+                }]))
+            results = await self._rpc_batch(calls)
+            
+            gas_price = int(results[0], 16)
+            if self._nonce_resync_needed:
+                self._local_nonce = int(results[1], 16)
+                self._nonce_resync_needed = False
+            if gas_limit is None:
+                gas_limit = int(results[-1], 16) * 115 // 100  # 15% headroom over the estimate
+                self._gas_estimate_cache[route] = gas_limit
+            nonce = self._local_nonce
+            self._local_nonce += 1
+            
+            # Sign the flashloan transaction directly - only nonce, gas price, gas and calldata vary
+            raw_tx = sign_legacy_transaction(
+                self._signing_key, nonce, gas_price, gas_limit, self._contract_raw, data, BSC_CHAIN_ID
+            )
+            
+            # Submit over the persistent aiohttp session rather than web3's provider stack,
+            # racing all broadcast endpoints so propagation is as fast as the quickest one
+            tx_hash = await self._broadcast_raw_transaction('0x' + raw_tx.hex())
+            
+            # Transaction details are logged only once it is on its way
+            logger.info("[TX] Transaction sent: %s", tx_hash)
+            logger.info("[TX] Gas price: %.2f gwei", gas_price / 1e9)
+            logger.info("[TX] Using nonce: %d", nonce)
+            logger.info("[TX] Pair: %s", pair_address)
+            logger.info("[TX] Amount0Out: %d", amount0Out)
+            logger.info("[TX] Amount1Out: %d", amount1Out)
+            logger.info("[TX] TokenBorrow: %s", opportunity.token_in)
+            logger.info("[TX] TokenTarget: %s", opportunity.token_out)
+            logger.info("[TX] Buy Router: %s", buy_router)
+            logger.info("[TX] Sell Router: %s", sell_router)
+            logger.info("[TX] Estimated gas cost: %.6f BNB", gas_limit * gas_price / 1e18)
+            
+            # Wait for confirmation in the background - scanning continues meanwhile
+            self._inflight_tokens[opportunity.token_in] += 1
+            tracker = asyncio.create_task(self._track_trade(opportunity, tx_hash, gas_price))
+            self._trade_trackers.add(tracker)
+            tracker.add_done_callback(self._trade_trackers.discard)
+            return True
                 
         except Exception as e:
             logger.error(f"[ERROR] Error executing flashloan arbitrage: {e}")
+            self._nonce_resync_needed = True  # The nonce may not have been used
             return False
             
-    def run_continuous_immediate_scanning(self):
+    async def _track_trade(self, opportunity: ArbitrageOpportunity, tx_hash: str, gas_price: int):
+        """Wait for a submitted trade's receipt and record the outcome"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_receipts[tx_hash] = future
+        try:
+            receipt = await asyncio.wait_for(future, timeout=120)
+        except asyncio.TimeoutError:
+            self._pending_receipts.pop(tx_hash, None)
+            self._nonce_resync_needed = True  # A stuck transaction leaves the local nonce unreliable
+            logger.warning(f"[FAILED] No receipt for {tx_hash} after 120s")
+            self.telegram.send_execution_result(opportunity, False, error="No receipt after 120s")
+            return
+        finally:
+            self._inflight_tokens[opportunity.token_in] -= 1
+            if self._inflight_tokens[opportunity.token_in] <= 0:
+                del self._inflight_tokens[opportunity.token_in]
+            
+        actual_gas_used = int(receipt['gasUsed'], 16)
+        if int(receipt['status'], 16) == 1:
+            actual_gas_cost = actual_gas_used * gas_price / 1e18
+            
+            logger.info(f"[SUCCESS] Flashloan arbitrage successful!")
+            logger.info(f"[SUCCESS] Profit: {opportunity.profit_percentage:.2%}")
+            logger.info(f"[SUCCESS] Gas used: {actual_gas_used}")
+            logger.info(f"[SUCCESS] Gas cost: {actual_gas_cost:.6f} BNB")
+            
+            self.stats.trades_successful += 1
+            self.stats.total_profit_eth += opportunity.profit_percentage * 0.1  # Estimate
+            self.stats.total_gas_spent_eth += actual_gas_cost
+            
+            self.telegram.send_execution_result(opportunity, True, tx_hash=tx_hash)
+        else:
+            logger.warning(f"[FAILED] Transaction failed with status: {receipt['status']}")
+            logger.warning(f"[DEBUG] Gas used: {actual_gas_used}")
+            self.telegram.send_execution_result(opportunity, False, tx_hash=tx_hash, error="Transaction reverted")
+            
+    async def _run_on_new_heads(self, scan_pairs: List[Tuple[int, int]]):
+        """Scan once per new block, driven by an eth_subscribe('newHeads') WebSocket feed"""
+        new_head = asyncio.Event()
+        latest_block = 0
+        
+        async def follow_heads():
+            nonlocal latest_block
+            async with self.session.ws_connect(self.ws_url, heartbeat=30) as ws:
+                await ws.send_str(_json_dumps(
+                    {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}
+                ))
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    head = _json_loads(message.data).get('params', {}).get('result')
+                    if head:
+                        latest_block = int(head['number'], 16)
+                        new_head.set()
+            raise ConnectionError("newHeads subscription closed")
+            
+        logger.info(f"Scanning on new blocks from {self.ws_url}")
+        follower = asyncio.create_task(follow_heads())
+        try:
+            while True:
+                # Heads arriving during a round are coalesced - the next round scans the latest block
+                waiter = asyncio.create_task(new_head.wait())
+                done, _ = await asyncio.wait(
+                    {follower, waiter}, timeout=self.head_timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    waiter.cancel()
+                    raise TimeoutError(f"no new block for {self.head_timeout}s")
+                if follower.done():
+                    waiter.cancel()
+                    follower.result()  # Re-raise why the subscription ended
+                new_head.clear()
+                
+                round_start = time.time()
+                self._set_block(latest_block)
+                await self._scan_round(scan_pairs)
+                
+                # Only throttle when rounds finish faster than the floor (e.g. bursty or reorging heads)
+                await asyncio.sleep(max(0.0, self.min_round_interval - (time.time() - round_start)))
+        finally:
+            follower.cancel()
+            
+    async def _scan_round(self, scan_pairs: List[Tuple[int, int]]):
+        """Scan all pairs concurrently and report session statistics"""
+        start_time = time.time()
+        self.scan_count += 1
+        scan_count = self.scan_count
+        
+        logger.info("=" * 80)
+        logger.info(f"Starting immediate arbitrage scan #{scan_count} (block {self.current_block})")
+        
+        executed_this_round = False
+        
+        # Most promising pairs first, so they get the semaphore slots before the rest
+        scan_pairs = heapq.nlargest(len(scan_pairs), scan_pairs, key=lambda pair: self._pair_scores.get(pair, 0.0))
+        
+        # One flashloan per borrowed token until its receipt arrives - blocked pairs cost no RPC or notification
+        if self._inflight_tokens:
+            blocked = {(i, j) for i, j in scan_pairs if self._inflight_tokens[self.tokens[self.token_symbols[i]]]}
+            if blocked:
+                logger.info("[INFLIGHT] Skipping %d pairs - %s flashloan pending", len(blocked),
+                            ", ".join(sorted({self.token_symbols[i] for i, _ in blocked})))
+                scan_pairs = [pair for pair in scan_pairs if pair not in blocked]
+                
+        # Read reserves for every pair worth scanning in a single multicall up front,
+        # so the concurrent pair scans below hit the block cache
+        amount_in = self.scan_amount_in
+        await self._fetch_reserves([
+            self.pair_addresses[(d, i, j)][0]
+            for i, j in scan_pairs if not self._predicts_no_profit(i, j, amount_in)
+            for d in range(len(self.router_names))
+        ])
+        
+        # Scan all pairs concurrently - the semaphore bounds in-flight RPCs
+        results = await asyncio.gather(
+            *[self._scan_pair_async(i, j, amount_in) for i, j in scan_pairs],
+            return_exceptions=True
+        )
+        
+        opportunities = []
+        for (i, j), result in zip(scan_pairs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error scanning {self.token_symbols[i]}/{self.token_symbols[j]}: {result}")
+                continue
+                
+            self.stats.pairs_scanned += 1
+            profit = result.profit_percentage if result is not None else 0.0
+            self._pair_scores[(i, j)] = 0.9 * self._pair_scores.get((i, j), 0.0) + 0.1 * profit
+            if result is None:
+                continue
+            opportunities.append(result)
+                
+        # Execute only the most profitable confirmed opportunity of the round
+        if opportunities:
+            best = max(opportunities, key=lambda opportunity: opportunity.profit_percentage)
+            if await self._execute_immediately(best):
+                executed_this_round = True
+                logger.info(f"[EXECUTED] Trade completed for {best.token_in_symbol}/{best.token_out_symbol}")
+        
+        self.stats.scans_completed += 1
+        scan_time = time.time() - start_time
+        
+        if executed_this_round:
+            logger.info(f"[ROUND] Scan #{scan_count} completed with EXECUTION in {scan_time:.2f}s")
+        else:
+            logger.info(f"[ROUND] Scan #{scan_count} completed with no execution in {scan_time:.2f}s")
+        
+        # Print session statistics - only every few rounds, the [ROUND] line covers the rest
+        if scan_count % self.stats_log_every == 0 and logger.isEnabledFor(logging.INFO):
+            logger.info(SESSION_STATS_FORMAT.format(s=self.stats))
+        
+        # Send periodic stats report
+        current_time = time.time()
+        if current_time - self.last_stats_report > self.stats_report_interval:
+            self.telegram.send_stats_report(self.stats)
+            self.last_stats_report = current_time
+            
+    async def run_continuous_immediate_scanning(self):
         """Run continuous scanning with immediate execution"""
         scan_interval = int(os.getenv('SCAN_INTERVAL', '10'))  # Faster scanning
         
+        await self.start()
+        
         # Send start notification
         self.telegram.send_start_notification()
         
         logger.info(f"Starting continuous immediate arbitrage scanning")
         logger.info(f"Scan interval: {scan_interval}s")
-        logger.info(f"Request delay: {self.request_delay}s")
         
         # High-frequency pairs for immediate execution
         immediate_pairs = [
@@ -723,65 +1312,46 @@ class ImmediateArbitrageScanner:
             ('CAKE', 'BUSD'), ('CAKE', 'WBNB')
         ]
         
-        scan_count = 0
+        # Resolve pair symbols to token indices once
+        scan_pairs = [
+            (self.token_index[token_in_symbol], self.token_index[token_out_symbol])
+            for token_in_symbol, token_out_symbol in immediate_pairs
+            if token_in_symbol in self.token_index and token_out_symbol in self.token_index
+        ]
         
         try:
             while True:
-                start_time = time.time()
-                scan_count += 1
-                
-                logger.info("=" * 80)
-                logger.info(f"Starting immediate arbitrage scan #{scan_count}")
-                
-                executed_this_round = False
-                
-                for i, (token_in_symbol, token_out_symbol) in enumerate(immediate_pairs, 1):
-                    if token_in_symbol in self.tokens and token_out_symbol in self.tokens:
-                        logger.info(f"[{i}/{len(immediate_pairs)}] Checking {token_in_symbol}/{token_out_symbol}")
+                if self.ws_url:
+                    try:
+                        await self._run_on_new_heads(scan_pairs)
+                    except Exception as e:
+                        logger.warning(f"newHeads subscription failed ({e}) - polling for {self.head_timeout}s before reconnecting")
                         
-                        amount_in = int(1e18)  # 1 token
-                        executed = self._scan_pair_and_execute_immediately(token_in_symbol, token_out_symbol, amount_in)
+                # Poll on SCAN_INTERVAL - indefinitely without a WebSocket, else until the next reconnect attempt
+                poll_until = time.time() + self.head_timeout if self.ws_url else float('inf')
+                while time.time() < poll_until:
+                    round_start = time.time()
+                    try:
+                        await self._update_block_number()
+                    except Exception as e:
+                        logger.warning(f"Could not fetch block number: {e}")
+                        # Can't tell if cached reserves are current
+                        self._reserves_cache.clear()
+                        self._last_reserves.clear()
                         
-                        if executed:
-                            executed_this_round = True
-                            logger.info(f"[EXECUTED] Trade completed for {token_in_symbol}/{token_out_symbol}")
-                            break  # Exit scan after successful execution
-                        
-                        self.stats['pairs_scanned'] += 1
-                
-                self.stats['scans_completed'] += 1
-                scan_time = time.time() - start_time
-                
-                if executed_this_round:
-                    logger.info(f"[ROUND] Scan #{scan_count} completed with EXECUTION in {scan_time:.2f}s")
-                else:
-                    logger.info(f"[ROUND] Scan #{scan_count} completed with no execution in {scan_time:.2f}s")
-                
-                # Print session statistics
-                logger.info("Session Statistics:")
-                logger.info(f"   Scans: {self.stats['scans_completed']}")
-                logger.info(f"   Pairs scanned: {self.stats['pairs_scanned']}")
-                logger.info(f"   Opportunities found: {self.stats['opportunities_found']}")
-                logger.info(f"   Immediate executions: {self.stats['immediate_executions']}")
-                logger.info(f"   Trades attempted: {self.stats['trades_attempted']}")
-                logger.info(f"   Trades successful: {self.stats['trades_successful']}")
-                logger.info(f"   Total profit: {self.stats['total_profit_eth']:.6f} BNB")
-                logger.info(f"   Total gas cost: {self.stats['total_gas_spent_eth']:.6f} BNB")
-                
-                # Send periodic stats report
-                current_time = time.time()
-                if current_time - self.last_stats_report > self.stats_report_interval:
-                    self.telegram.send_stats_report(self.stats)
-                    self.last_stats_report = current_time
-                
-                # Wait for next scan
-                logger.info(f"Waiting {scan_interval} seconds until next scan...")
-                time.sleep(scan_interval)
-                
-        except KeyboardInterrupt:
+                    await self._scan_round(scan_pairs)
+                    
+                    # Wait for next scan - the interval runs from round start, so slow rounds don't stretch it
+                    wait = max(0.0, scan_interval - (time.time() - round_start))
+                    logger.info(f"Waiting {wait:.1f} seconds until next scan...")
+                    await asyncio.sleep(wait)
+                    
+        except (KeyboardInterrupt, asyncio.CancelledError):
             logger.info("Scanner stopped by user")
         except Exception as e:
             logger.error(f"Scanner error: {e}")
+        finally:
+            await self.close()
 
 def main():
     """Main entry point"""
@@ -789,7 +1359,11 @@ def main():
     logger.info("============================================================")
     
     scanner = ImmediateArbitrageScanner()
-    scanner.run_continuous_immediate_scanning()
+    
+    try:
+        asyncio.run(scanner.run_continuous_immediate_scanning())
+    except KeyboardInterrupt:
+        logger.info("Scanner stopped by user")
 
 if __name__ == "__main__":
     main()
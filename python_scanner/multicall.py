@@ -0,0 +1,25 @@
+"""
+Multicall3 helper for BSC
+- Fans out many read-only calls in a single eth_call via aggregate3
+- Calls that revert come back as None instead of failing the whole batch
+"""
+
+from typing import List, Optional, Tuple
+from web3 import Web3
+from eth_abi import decode
+from abi_encoding import MULTICALL3_ADDRESS, encode_aggregate3, encode_aggregate3_call
+
+def multicall(w3: Web3, calls: List[Tuple[str, bytes]], block_identifier='latest') -> List[Optional[bytes]]:
+    """Run (target, calldata) calls in one aggregate3 eth_call, returning None for each call that reverted"""
+    if not calls:
+        return []
+        
+    # Encoded with the shared hand-rolled encoders - skips web3's contract layer and its formatters
+    result = w3.eth.call({
+        'to': MULTICALL3_ADDRESS,
+        'data': encode_aggregate3([
+            encode_aggregate3_call(bytes.fromhex(target[2:]), calldata) for target, calldata in calls
+        ])
+    }, block_identifier)
+    
+    return [data if success else None for success, data in decode(['(bool,bytes)[]'], result)[0]]
@@ -7,15 +7,35 @@ Integrated BSC Flashloan Arbitrage Scanner & Executor
 
 import time
 import logging
+import asyncio
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from decimal import Decimal
 import json
+import heapq
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from web3 import Web3
 from web3.exceptions import ContractLogicError, TransactionNotFound
+from web3.middleware import geth_poa_middleware
+from web3.datastructures import AttributeDict
 import requests
+import websockets
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 import os
+from abi_encoding import (
+    GET_RESERVES_SELECTOR, TOKEN0_SELECTOR, TOKEN1_SELECTOR, encode_get_amounts_out, encode_get_pair
+)
+from multicall import multicall
+from addresses import checksum_address
+
+# orjson is much faster on large multicall payloads - fall back to web3's stdlib json handling
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Load environment variables
 load_dotenv()
@@ -31,7 +51,309 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# BSC Flashloan Contract ABI (matches deployed contract)
+FLASHLOAN_ABI = [
+    {
+        "inputs": [],
+        "stateMutability": "nonpayable",
+        "type": "constructor"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "pair", "type": "address"},
+            {"internalType": "uint256", "name": "amount0Out", "type": "uint256"},
+            {"internalType": "uint256", "name": "amount1Out", "type": "uint256"},
+            {"internalType": "address", "name": "tokenBorrow", "type": "address"},
+            {"internalType": "address", "name": "tokenTarget", "type": "address"},
+            {"internalType": "address", "name": "buyRouter", "type": "address"},
+            {"internalType": "address", "name": "sellRouter", "type": "address"}
+        ],
+        "name": "executeFlashloanArbitrage",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "sender", "type": "address"},
+            {"internalType": "uint256", "name": "amount0", "type": "uint256"},
+            {"internalType": "uint256", "name": "amount1", "type": "uint256"},
+            {"internalType": "bytes", "name": "data", "type": "bytes"}
+        ],
+        "name": "pancakeCall",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getOwner",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "token", "type": "address"},
+            {"internalType": "uint256", "name": "amount", "type": "uint256"}
+        ],
+        "name": "withdrawToken",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "address", "name": "token", "type": "address"}
+        ],
+        "name": "withdrawAllTokens",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "withdrawBNB",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+
+# Factory-confirmed pair addresses, shared with immediate_scanner.py (same factory, same key format)
+PAIR_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pair_cache.json')
+
+def pair_cache_key(token_a: str, token_b: str) -> str:
+    """Order-independent pair cache key ("token0,token1", lowercase)"""
+    return ','.join(sorted((token_a.lower(), token_b.lower())))
+
+def decode_amount_out(result: Optional[bytes]) -> Optional[int]:
+    """Last amount of a getAmountsOut result, read straight from its layout (offset, length, amounts...)"""
+    if not result or len(result) < 128 or int.from_bytes(result[32:64], 'big') < 2:
+        return None
+    return int.from_bytes(result[-32:], 'big')
+
+def _orjson_default(obj):
+    """Serialise the web3 types orjson doesn't know natively (same mapping as web3's Web3JsonEncoder)"""
+    if isinstance(obj, AttributeDict):
+        return dict(obj)
+    if isinstance(obj, bytes):
+        return '0x' + bytes.hex(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class FastHTTPProvider(Web3.HTTPProvider):
+    """HTTPProvider that encodes requests and parses responses with orjson"""
+    
+    def encode_rpc_request(self, method, params) -> bytes:
+        return orjson.dumps({
+            'jsonrpc': '2.0',
+            'method': method,
+            'params': params or [],
+            'id': next(self.request_counter)
+        }, default=_orjson_default)
+        
+    def decode_rpc_response(self, raw_response: bytes):
+        return orjson.loads(raw_response)
+
+class MulticallAggregator:
+    """Batch read-only calls into Multicall3 aggregate3 eth_calls, one per chunk of calls"""
+    
+    def __init__(self, w3: Web3, rate_limit=None, chunk_size: int = 100, max_workers: int = 1,
+                 hedge_w3s: Optional[List[Web3]] = None, hedge_primary: Optional[Web3] = None):
+        self.w3 = w3
+        self.rate_limit = rate_limit
+        self.chunk_size = chunk_size
+        # Chunks are independent eth_calls, so with several workers they go out in parallel
+        # (requests releases the GIL while waiting on the socket)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        # Hedged endpoints get the same eth_call as the primary and the first answer wins -
+        # a separate pool, so chunk workers never wait on threads of their own pool.
+        # hedge_primary stands in for w3 in the race when w3 can't have a request abandoned mid-flight
+        # (web3's sync WebsocketProvider doesn't match replies by id - a lost race would desync the socket)
+        self.hedge_w3s = [hedge_primary or w3] + list(hedge_w3s or [])
+        self.hedge_executor = (
+            ThreadPoolExecutor(max_workers=len(self.hedge_w3s) * max_workers)
+            if len(self.hedge_w3s) > 1 else None
+        )
+        
+    def aggregate(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        """Run (target, calldata) calls, returning None for each call that reverted"""
+        if not calls:
+            return []
+            
+        chunks = [calls[n:n + self.chunk_size] for n in range(0, len(calls), self.chunk_size)]
+        if self.executor is None or len(chunks) == 1:
+            results = [self._aggregate_chunk(chunk) for chunk in chunks]
+        else:
+            results = list(self.executor.map(self._aggregate_chunk, chunks))
+            
+        return [data for chunk_results in results for data in chunk_results]
+        
+    def _aggregate_chunk(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        """Run one aggregate3 eth_call"""
+        if self.rate_limit is not None:
+            self.rate_limit()
+            
+        if self.hedge_executor is None:
+            return multicall(self.w3, calls)
+            
+        pending = {self.hedge_executor.submit(multicall, w3, calls) for w3 in self.hedge_w3s}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for slower in pending:
+                        slower.cancel()
+                    return future.result()
+                error = future.exception()
+                
+        # Every endpoint failed
+        raise error
+
+class NewHeadsFollower:
+    """Follow an eth_subscribe('newHeads') feed on a background thread and expose the latest block"""
+    
+    def __init__(self, ws_url: str, reconnect_delay: float = 5.0):
+        self.ws_url = ws_url
+        self.reconnect_delay = reconnect_delay
+        self.latest_block = 0
+        self.connected = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='newHeads', daemon=True)
+        
+    def start(self):
+        self._thread.start()
+        
+    def wait_past(self, last_block: int, timeout: float) -> int:
+        """Block until a head newer than last_block arrives, the feed drops, or timeout passes"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.latest_block > last_block or not self.connected, timeout)
+            return max(self.latest_block, last_block)
+            
+    def _run(self):
+        asyncio.run(self._follow())
+        
+    async def _follow(self):
+        # The web3 sync WebsocketProvider can't carry subscriptions, so this is a socket of its own
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=20) as ws:
+                    await ws.send(json.dumps(
+                        {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}
+                    ))
+                    self.connected = True
+                    async for message in ws:
+                        head = json.loads(message).get('params', {}).get('result')
+                        if head:
+                            with self._condition:
+                                self.latest_block = int(head['number'], 16)
+                                self._condition.notify_all()
+            except Exception as e:
+                logger.warning(f"newHeads subscription failed ({e}) - reconnecting in {self.reconnect_delay}s")
+            finally:
+                with self._condition:
+                    self.connected = False
+                    self._condition.notify_all()
+                    
+            await asyncio.sleep(self.reconnect_delay)
+
+# Comprehensive list of exactly 60 high-liquidity trading pairs
+PRIORITY_PAIRS = [
+    # Major stablecoin pairs (highest liquidity)
+    ('BUSD', 'USDT'),
+    ('BUSD', 'USDC'),
+    ('USDT', 'USDC'),
+
+    # WBNB pairs (core BNB pairs)
+    ('WBNB', 'BUSD'),
+    ('WBNB', 'USDT'),
+    ('WBNB', 'USDC'),
+    ('WBNB', 'ETH'),
+    ('WBNB', 'BTCB'),
+    ('WBNB', 'CAKE'),
+
+    # Major crypto pairs with stablecoins
+    ('ETH', 'BUSD'),
+    ('ETH', 'USDT'),
+    ('ETH', 'USDC'),
+    ('BTCB', 'BUSD'),
+    ('BTCB', 'USDT'),
+    ('BTCB', 'USDC'),
+
+    # Cross-crypto pairs
+    ('ETH', 'BTCB'),
+    ('ETH', 'CAKE'),
+    ('BTCB', 'CAKE'),
+
+    # CAKE ecosystem pairs
+    ('CAKE', 'BUSD'),
+    ('CAKE', 'USDT'),
+    ('CAKE', 'USDC'),
+
+    # Additional major token pairs
+    ('WBNB', 'ADA'),
+    ('WBNB', 'DOT'),
+    ('WBNB', 'LINK'),
+    ('WBNB', 'UNI'),
+    ('WBNB', 'MATIC'),
+    ('WBNB', 'AVAX'),
+    ('WBNB', 'SOL'),
+    ('WBNB', 'LTC'),
+    ('WBNB', 'XRP'),
+    ('WBNB', 'DOGE'),
+
+    # ETH ecosystem pairs
+    ('ETH', 'ADA'),
+    ('ETH', 'DOT'),
+    ('ETH', 'LINK'),
+    ('ETH', 'UNI'),
+    ('ETH', 'MATIC'),
+    ('ETH', 'AVAX'),
+
+    # BTCB pairs
+    ('BTCB', 'ADA'),
+    ('BTCB', 'DOT'),
+    ('BTCB', 'LINK'),
+
+    # Stablecoin pairs with major tokens
+    ('ADA', 'BUSD'),
+    ('DOT', 'BUSD'),
+    ('LINK', 'BUSD'),
+    ('UNI', 'BUSD'),
+    ('MATIC', 'BUSD'),
+    ('AVAX', 'BUSD'),
+    ('SOL', 'BUSD'),
+    ('LTC', 'BUSD'),
+    ('XRP', 'BUSD'),
+    ('DOGE', 'BUSD'),
+
+    # USDT pairs
+    ('ADA', 'USDT'),
+    ('DOT', 'USDT'),
+    ('LINK', 'USDT'),
+    ('UNI', 'USDT'),
+    ('MATIC', 'USDT'),
+    ('AVAX', 'USDT'),
+    ('SOL', 'USDT'),
+    ('LTC', 'USDT'),
+    ('XRP', 'USDT'),
+    ('DOGE', 'USDT')
+]
+
+# Per-scan session statistics, %-formatted from the stats dict by the logger
+STATS_TEMPLATE = (
+    "Session Statistics:\n"
+    "  Scans: %(scans_completed)d\n"
+    "  Opportunities found: %(opportunities_found)d\n"
+    "  Profitable opportunities: %(profitable_opportunities)d\n"
+    "  Flashloans executed: %(flashloans_executed)d\n"
+    "  Successful arbitrages: %(successful_arbitrages)d\n"
+    "  Failed arbitrages: %(failed_arbitrages)d\n"
+    "  Total gas spent: %(total_gas_spent_bnb).6f BNB"
+)
+
+@dataclass(slots=True, frozen=True)
 class FlashloanOpportunity:
     """Real flashloan arbitrage opportunity"""
     token_borrow: str
@@ -57,8 +379,32 @@ class ProductionFlashloanArbitrage:
         logger.info("Initializing Production BSC Flashloan Arbitrage")
         
         # Web3 and account setup
+        self.ws_url = os.getenv('BSC_WS_URL')
+        self.rpc_url = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
+        self.block_poll_interval = 0.5  # Head polling while the newHeads feed is down (BSC blocks are ~3s)
+        self.heads = None  # newHeads follower, started with the scan loop
         self.w3 = self._setup_web3()
         self.account = self._setup_account()
+        # Extra endpoints that every multicall is raced against (tail latency of public RPCs)
+        self.hedge_w3s = self._setup_hedge_web3s()
+        # web3's sync WebsocketProvider shares one socket and event loop, so only HTTP runs chunks in parallel
+        self.multicall = MulticallAggregator(
+            self.w3,
+            rate_limit=self._rate_limit,
+            max_workers=1 if self.ws_url else 8,
+            hedge_w3s=self.hedge_w3s,
+            # Only HTTP is ever raced - with a WebSocket primary the hedge race uses an HTTP one instead
+            hedge_primary=(
+                self._configure_web3(self._http_provider(self.rpc_url))
+                if self.ws_url and self.hedge_w3s else None
+            )
+        )
+        self.chain_id = self.w3.eth.chain_id
+        self.gas_price = self.w3.eth.gas_price  # Refreshed once per scan
+        
+        # Local pending nonce - resynced from the node on the first execution and after any failure
+        self._local_nonce = 0
+        self._nonce_resync_needed = True
         
         # Comprehensive token addresses (BSC mainnet)
         self.tokens = {
@@ -130,17 +476,60 @@ class ProductionFlashloanArbitrage:
         # PancakeSwap Factory for pairs
         self.pancake_factory = '0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73'
         
+        # Checksum every address once up front, and keep raw 20-byte forms for calldata encoding
+        self.tokens = {symbol: Web3.to_checksum_address(address) for symbol, address in self.tokens.items()}
+        self.dex_routers = {name: Web3.to_checksum_address(address) for name, address in self.dex_routers.items()}
+        self.pancake_factory = Web3.to_checksum_address(self.pancake_factory)
+        self.token_addrs_raw = {address: bytes.fromhex(address[2:]) for address in self.tokens.values()}
+        
+        # Scanned pairs as (symbol_a, symbol_b, token_a, token_b, a_is_token0), resolved once rather
+        # than every scan. A V2 pair's token0 is always the lower address, so the flashswap side
+        # of each token is known without asking the pair
+        self.priority_pairs = [
+            (
+                token_a_symbol, token_b_symbol, self.tokens[token_a_symbol], self.tokens[token_b_symbol],
+                self.token_addrs_raw[self.tokens[token_a_symbol]] < self.token_addrs_raw[self.tokens[token_b_symbol]]
+            )
+            for token_a_symbol, token_b_symbol in PRIORITY_PAIRS
+            if token_a_symbol in self.tokens and token_b_symbol in self.tokens
+        ]
+        
+        # Pair addresses never change, so ask the factory once and keep them on disk
+        self.pair_cache = self._load_pair_cache()
+        self._pairs_checked = set()  # Keys already looked up this session (including missing pairs)
+        
+        # Pair info cache: token0/token1 per pair forever, reserves as (block fetched, info).
+        # Reserves only size the flashloan (quotes are always live), so they are refetched
+        # every N blocks rather than every scan
+        self._pair_tokens: Dict[str, Tuple[str, str]] = {}
+        self._pair_info_cache: Dict[str, Tuple[int, Dict]] = {}
+        self.reserves_refresh_blocks = int(os.getenv('RESERVES_REFRESH_BLOCKS', '20'))
+        self.current_block = 0
+        
         # Load flashloan contract
         self.flashloan_contract = self._load_flashloan_contract()
         
-        # Configuration
+        # Configuration - all environment settings are read here, once; nothing on the scan path reads os.environ
+        self.scan_interval = int(os.getenv('SCAN_INTERVAL', '30'))  # 30 seconds
         self.min_profit_threshold = float(os.getenv('MIN_PROFIT_THRESHOLD', '0.01'))  # 1%
         self.max_profit_threshold = 0.05  # 5%
+        # Same thresholds in basis points, so route checks stay in exact integer arithmetic
+        self.min_profit_bps = round(self.min_profit_threshold * 10000)
+        self.max_profit_bps = round(self.max_profit_threshold * 10000)
         self.min_profit_amount_usd = 50  # Minimum $50 profit
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.request_delay = 2.0  # 2 seconds between requests
+        # Adaptive pair selection: most scans only cover the top-K pairs by EWMA profit score,
+        # every Nth scan covers the full list so quiet pairs can work their way back up
+        self._pair_scores: Dict[Tuple[str, str], float] = {}
+        self.top_pairs = int(os.getenv('TOP_PAIRS', '20'))
+        self.full_scan_every = int(os.getenv('FULL_SCAN_EVERY', '5'))
+        
+        # Rate limiting (token bucket: sustained requests/second with a small burst allowance)
+        self.request_rate = float(os.getenv('RPC_RATE_LIMIT', '5'))
+        self.request_burst = 5
+        self._rate_tokens = float(self.request_burst)
+        self._rate_updated = time.monotonic()
+        self._rate_lock = threading.Lock()  # Multicall chunks may run in parallel threads
         
         # Statistics
         self.stats = {
@@ -160,15 +549,59 @@ class ProductionFlashloanArbitrage:
         
     def _setup_web3(self) -> Web3:
         """Setup Web3 connection"""
-        rpc_url = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        if self.ws_url:
+            # One persistent socket carries every call instead of an HTTP request each
+            provider = Web3.WebsocketProvider(
+                self.ws_url,
+                websocket_timeout=30,
+                websocket_kwargs={'ping_interval': 20}
+            )
+        else:
+            provider = self._http_provider(self.rpc_url)
+            
+        w3 = self._configure_web3(provider)
         
         if not w3.is_connected():
             raise ConnectionError(f"Failed to connect to BSC")
             
-        logger.info(f"Connected to BSC: Block {w3.eth.block_number}")
+        logger.info(f"Connected to BSC ({'WebSocket' if self.ws_url else 'HTTP'}): Block {w3.eth.block_number}")
         return w3
         
+    def _http_provider(self, rpc_url: str):
+        """HTTP provider on a pooled keep-alive session so every call reuses a warm TLS connection"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=32,
+            # Retry POSTs only when the connection failed - a request that reached the node may have
+            # been an eth_sendRawTransaction, and resending it reports "already known" for a live trade
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1, allowed_methods=None)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Connection'] = 'keep-alive'
+        
+        provider_class = FastHTTPProvider if orjson else Web3.HTTPProvider
+        return provider_class(rpc_url, session=session, request_kwargs={'timeout': 10})
+        
+    def _configure_web3(self, provider) -> Web3:
+        """Wrap a provider in Web3 with the middleware stack every connection uses"""
+        w3 = Web3(provider)
+        
+        # The chain is fixed, so drop the middleware that adds a preflight eth_chainId to every
+        # eth_call (validation) or that we never use (ENS names, gas price strategy)
+        for name in ('validation', 'name_to_address', 'gas_price_strategy'):
+            w3.middleware_onion.remove(name)
+        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        return w3
+        
+    def _setup_hedge_web3s(self) -> List[Web3]:
+        """Connections to the BSC_HEDGE_RPC_URLS endpoints (none unless configured)"""
+        urls = [url.strip() for url in os.getenv('BSC_HEDGE_RPC_URLS', '').split(',') if url.strip()]
+        if urls:
+            logger.info(f"Hedging multicalls across {len(urls) + 1} RPC endpoints")
+        return [self._configure_web3(self._http_provider(url)) for url in urls]
+        
     def _setup_account(self):
         """Setup trading account"""
         private_key = os.getenv('PRIVATE_KEY')
@@ -178,7 +611,7 @@ class ProductionFlashloanArbitrage:
             
         account = self.w3.eth.account.from_key(private_key)
         balance = self.w3.eth.get_balance(account.address)
-        balance_bnb = self.w3.from_wei(balance, 'ether')
+        balance_bnb = balance / 1e18  # Display/threshold only - a float, not from_wei's Decimal
         
         logger.info(f"Account loaded: {account.address}")
         logger.info(f"Balance: {balance_bnb:.4f} BNB")
@@ -203,79 +636,10 @@ class ProductionFlashloanArbitrage:
             
         logger.info(f"Loading flashloan contract: {contract_address}")
             
-        # BSC Flashloan Contract ABI (matches deployed contract)
-        abi = [
-            {
-                "inputs": [],
-                "stateMutability": "nonpayable",
-                "type": "constructor"
-            },
-            {
-                "inputs": [
-                    {"internalType": "address", "name": "pair", "type": "address"},
-                    {"internalType": "uint256", "name": "amount0Out", "type": "uint256"},
-                    {"internalType": "uint256", "name": "amount1Out", "type": "uint256"},
-                    {"internalType": "address", "name": "tokenBorrow", "type": "address"},
-                    {"internalType": "address", "name": "tokenTarget", "type": "address"},
-                    {"internalType": "address", "name": "buyRouter", "type": "address"},
-                    {"internalType": "address", "name": "sellRouter", "type": "address"}
-                ],
-                "name": "executeFlashloanArbitrage",
-                "outputs": [],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            },
-            {
-                "inputs": [
-                    {"internalType": "address", "name": "sender", "type": "address"},
-                    {"internalType": "uint256", "name": "amount0", "type": "uint256"},
-                    {"internalType": "uint256", "name": "amount1", "type": "uint256"},
-                    {"internalType": "bytes", "name": "data", "type": "bytes"}
-                ],
-                "name": "pancakeCall",
-                "outputs": [],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            },
-            {
-                "inputs": [],
-                "name": "getOwner",
-                "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                "stateMutability": "view",
-                "type": "function"
-            },
-            {
-                "inputs": [
-                    {"internalType": "address", "name": "token", "type": "address"},
-                    {"internalType": "uint256", "name": "amount", "type": "uint256"}
-                ],
-                "name": "withdrawToken",
-                "outputs": [],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            },
-            {
-                "inputs": [
-                    {"internalType": "address", "name": "token", "type": "address"}
-                ],
-                "name": "withdrawAllTokens",
-                "outputs": [],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            },
-            {
-                "inputs": [],
-                "name": "withdrawBNB",
-                "outputs": [],
-                "stateMutability": "nonpayable",
-                "type": "function"
-            }
-        ]
-        
         try:
             contract = self.w3.eth.contract(
                 address=Web3.to_checksum_address(contract_address),
-                abi=abi
+                abi=FLASHLOAN_ABI
             )
             
             # Verify contract
@@ -290,361 +654,373 @@ class ProductionFlashloanArbitrage:
             return None
             
     def _rate_limit(self):
-        """Apply rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.request_delay:
-            sleep_time = self.request_delay - time_since_last
-            time.sleep(sleep_time)
+        """Apply rate limiting - only waits once the burst allowance is used up"""
+        with self._rate_lock:
+            now = time.monotonic()
+            self._rate_tokens = min(self.request_burst, self._rate_tokens + (now - self._rate_updated) * self.request_rate)
+            self._rate_updated = now
             
-        self.last_request_time = time.time()
+            if self._rate_tokens < 1:
+                time.sleep((1 - self._rate_tokens) / self.request_rate)
+                self._rate_tokens = 1.0
+                self._rate_updated = time.monotonic()
+                
+            self._rate_tokens -= 1
         
-    def get_pair_address(self, token_a: str, token_b: str) -> Optional[str]:
-        """Get PancakeSwap pair address"""
+    def _load_pair_cache(self) -> Dict[str, str]:
+        """Load factory-confirmed pair addresses from disk"""
         try:
-            factory_abi = [
-                {
-                    "inputs": [
-                        {"internalType": "address", "name": "tokenA", "type": "address"},
-                        {"internalType": "address", "name": "tokenB", "type": "address"}
-                    ],
-                    "name": "getPair",
-                    "outputs": [{"internalType": "address", "name": "pair", "type": "address"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]
-            
-            factory = self.w3.eth.contract(
-                address=Web3.to_checksum_address(self.pancake_factory),
-                abi=factory_abi
-            )
+            with open(PAIR_CACHE_FILE, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable pair cache {PAIR_CACHE_FILE}: {e}")
+            return {}
             
-            pair_address = factory.functions.getPair(
-                Web3.to_checksum_address(token_a),
-                Web3.to_checksum_address(token_b)
-            ).call()
+    def _save_pair_cache(self):
+        """Persist factory-confirmed pair addresses, keeping entries written by other scanners"""
+        pair_cache = self._load_pair_cache()
+        pair_cache.update(self.pair_cache)
+        try:
+            with open(PAIR_CACHE_FILE, 'w') as f:
+                json.dump(pair_cache, f, indent=2, sort_keys=True)
+        except Exception as e:
+            logger.warning(f"Could not save pair cache: {e}")
             
-            if pair_address != '0x0000000000000000000000000000000000000000':
-                return pair_address
-            return None
+    def resolve_pair_addresses(self, token_pairs: List[Tuple[str, str]]):
+        """Look up uncached pairs with the factory's getPair() in one multicall"""
+        unresolved = []
+        for token_a, token_b in token_pairs:
+            key = pair_cache_key(token_a, token_b)
+            if key not in self.pair_cache and key not in self._pairs_checked:
+                self._pairs_checked.add(key)
+                unresolved.append((key, token_a, token_b))
+                
+        if not unresolved:
+            return
             
+        try:
+            results = self.multicall.aggregate([
+                (self.pancake_factory, encode_get_pair(bytes.fromhex(token_a[2:]), bytes.fromhex(token_b[2:])))
+                for _, token_a, token_b in unresolved
+            ])
         except Exception as e:
-            logger.debug(f"Error getting pair: {e}")
-            return None
+            logger.debug("Error getting pairs: %s", e)
+            for key, _, _ in unresolved:
+                self._pairs_checked.discard(key)  # Retry on the next scan
+            return
             
-    def get_pair_info(self, pair_address: str) -> Optional[Dict]:
-        """Get pair token info and reserves"""
-        try:
-            pair_abi = [
-                {
-                    "inputs": [],
-                    "name": "token0",
-                    "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                },
-                {
-                    "inputs": [],
-                    "name": "token1", 
-                    "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                },
-                {
-                    "inputs": [],
-                    "name": "getReserves",
-                    "outputs": [
-                        {"internalType": "uint112", "name": "_reserve0", "type": "uint112"},
-                        {"internalType": "uint112", "name": "_reserve1", "type": "uint112"},
-                        {"internalType": "uint32", "name": "_blockTimestampLast", "type": "uint32"}
-                    ],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]
+        found = False
+        for (key, _, _), data in zip(unresolved, results):
+            if not data or len(data) < 32 or not any(data[12:32]):
+                continue  # Lookup failed or no pair deployed
+                
+            self.pair_cache[key] = checksum_address(data[12:32])
+            found = True
             
-            pair = self.w3.eth.contract(
-                address=Web3.to_checksum_address(pair_address),
-                abi=pair_abi
-            )
+        if found:
+            self._save_pair_cache()
             
-            token0 = pair.functions.token0().call()
-            token1 = pair.functions.token1().call()
-            reserves = pair.functions.getReserves().call()
+    def get_pair_address(self, token_a: str, token_b: str) -> Optional[str]:
+        """Get PancakeSwap pair address"""
+        key = pair_cache_key(token_a, token_b)
+        if key not in self.pair_cache:
+            self.resolve_pair_addresses([(token_a, token_b)])
+        return self.pair_cache.get(key)
             
-            return {
-                'token0': token0,
-                'token1': token1,
-                'reserve0': reserves[0],
-                'reserve1': reserves[1]
-            }
+    def get_pair_info(self, pair_address: str) -> Optional[Dict]:
+        """Get pair token info and reserves"""
+        return self.get_pairs_info([pair_address]).get(pair_address)
+        
+    def get_pairs_info(self, pair_addresses: List[str]) -> Dict[str, Dict]:
+        """Get token info and reserves for many pairs, refreshing stale entries in one Multicall3 call"""
+        calls = []
+        refreshed = []
+        for pair_address in pair_addresses:
+            cached = self._pair_info_cache.get(pair_address)
+            if cached and self.current_block - cached[0] < self.reserves_refresh_blocks:
+                continue
+                
+            # token0/token1 never change, so they're only read the first time a pair is seen
+            fetch_tokens = pair_address not in self._pair_tokens
+            if fetch_tokens:
+                calls.append((pair_address, TOKEN0_SELECTOR))
+                calls.append((pair_address, TOKEN1_SELECTOR))
+            calls.append((pair_address, GET_RESERVES_SELECTOR))
+            refreshed.append((pair_address, fetch_tokens))
             
-        except Exception as e:
-            logger.debug(f"Error getting pair info: {e}")
-            return None
+        if calls:
+            try:
+                results = self.multicall.aggregate(calls)
+            except Exception as e:
+                logger.debug("Error getting pair info: %s", e)
+                results = [None] * len(calls)  # Fall back to whatever is cached
+                
+            n = 0
+            for pair_address, fetch_tokens in refreshed:
+                if fetch_tokens:
+                    token0_data, token1_data = results[n], results[n + 1]
+                    n += 2
+                reserves_data = results[n]
+                n += 1
+                
+                # Fixed-size results, so slice the words instead of running the ABI decoder.
+                # Calls to an address without code "succeed" with empty return data
+                if fetch_tokens:
+                    if not token0_data or len(token0_data) < 32 or not token1_data or len(token1_data) < 32:
+                        continue
+                    self._pair_tokens[pair_address] = (
+                        checksum_address(token0_data[12:32]),
+                        checksum_address(token1_data[12:32])
+                    )
+                    
+                if not reserves_data or len(reserves_data) < 64:
+                    continue
+                reserve0 = int.from_bytes(reserves_data[0:32], 'big')
+                reserve1 = int.from_bytes(reserves_data[32:64], 'big')
+                
+                token0, token1 = self._pair_tokens[pair_address]
+                self._pair_info_cache[pair_address] = (self.current_block, {
+                    'token0': token0,
+                    'token1': token1,
+                    'reserve0': reserve0,
+                    'reserve1': reserve1
+                })
+                
+        pairs_info = {}
+        for pair_address in pair_addresses:
+            cached = self._pair_info_cache.get(pair_address)
+            if cached:
+                pairs_info[pair_address] = cached[1]
+                
+        return pairs_info
             
     def get_router_price(self, router_address: str, amount_in: int, token_in: str, token_out: str) -> Optional[int]:
         """Get amount out from router"""
         self._rate_limit()
         
         try:
-            router_abi = [
-                {
-                    "inputs": [
-                        {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                        {"internalType": "address[]", "name": "path", "type": "address[]"}
-                    ],
-                    "name": "getAmountsOut",
-                    "outputs": [{"internalType": "uint256[]", "name": "amounts", "type": "uint256[]"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                }
-            ]
-            
-            router = self.w3.eth.contract(
-                address=Web3.to_checksum_address(router_address),
-                abi=router_abi
-            )
-            
-            path = [
-                Web3.to_checksum_address(token_in),
-                Web3.to_checksum_address(token_out)
-            ]
-            
-            amounts = router.functions.getAmountsOut(amount_in, path).call()
+            result = self.w3.eth.call({
+                'to': router_address,
+                'data': encode_get_amounts_out(amount_in, bytes.fromhex(token_in[2:]), bytes.fromhex(token_out[2:]))
+            })
+            return decode_amount_out(result)
             
-            if len(amounts) >= 2:
-                return amounts[-1]
+        except Exception as e:
+            logger.debug("Router price error: %s", e)
             return None
             
+    def get_router_prices(self, quote_calls: List[Tuple[str, bytes]]) -> List[Optional[int]]:
+        """Run (router, getAmountsOut calldata) quotes in one Multicall3 call"""
+        if not quote_calls:
+            return []
+            
+        try:
+            results = self.multicall.aggregate(quote_calls)
         except Exception as e:
-            logger.debug(f"Router price error: {e}")
-            return None
+            logger.debug("Router price batch error: %s", e)
+            return [None] * len(quote_calls)
+            
+        return [decode_amount_out(data) for data in results]
             
-    def find_arbitrage_opportunities(self) -> List[FlashloanOpportunity]:
-        """Find flashloan arbitrage opportunities"""
+    def find_arbitrage_opportunities(self) -> Tuple[List[FlashloanOpportunity], int]:
+        """Find flashloan arbitrage opportunities, returned with how many of them are profitable"""
         opportunities = []
+        profitable_count = 0
         
-        # Comprehensive list of exactly 60 high-liquidity trading pairs
-        priority_pairs = [
-            # Major stablecoin pairs (highest liquidity)
-            ('BUSD', 'USDT'),
-            ('BUSD', 'USDC'),
-            ('USDT', 'USDC'),
-            
-            # WBNB pairs (core BNB pairs)
-            ('WBNB', 'BUSD'),
-            ('WBNB', 'USDT'),
-            ('WBNB', 'USDC'),
-            ('WBNB', 'ETH'),
-            ('WBNB', 'BTCB'),
-            ('WBNB', 'CAKE'),
-            
-            # Major crypto pairs with stablecoins
-            ('ETH', 'BUSD'),
-            ('ETH', 'USDT'),
-            ('ETH', 'USDC'),
-            ('BTCB', 'BUSD'),
-            ('BTCB', 'USDT'),
-            ('BTCB', 'USDC'),
-            
-            # Cross-crypto pairs
-            ('ETH', 'BTCB'),
-            ('ETH', 'CAKE'),
-            ('BTCB', 'CAKE'),
-            
-            # CAKE ecosystem pairs
-            ('CAKE', 'BUSD'),
-            ('CAKE', 'USDT'),
-            ('CAKE', 'USDC'),
-            
-            # Additional major token pairs
-            ('WBNB', 'ADA'),
-            ('WBNB', 'DOT'),
-            ('WBNB', 'LINK'),
-            ('WBNB', 'UNI'),
-            ('WBNB', 'MATIC'),
-            ('WBNB', 'AVAX'),
-            ('WBNB', 'SOL'),
-            ('WBNB', 'LTC'),
-            ('WBNB', 'XRP'),
-            ('WBNB', 'DOGE'),
-            
-            # ETH ecosystem pairs
-            ('ETH', 'ADA'),
-            ('ETH', 'DOT'),
-            ('ETH', 'LINK'),
-            ('ETH', 'UNI'),
-            ('ETH', 'MATIC'),
-            ('ETH', 'AVAX'),
-            
-            # BTCB pairs
-            ('BTCB', 'ADA'),
-            ('BTCB', 'DOT'),
-            ('BTCB', 'LINK'),
-            
-            # Stablecoin pairs with major tokens
-            ('ADA', 'BUSD'),
-            ('DOT', 'BUSD'),
-            ('LINK', 'BUSD'),
-            ('UNI', 'BUSD'),
-            ('MATIC', 'BUSD'),
-            ('AVAX', 'BUSD'),
-            ('SOL', 'BUSD'),
-            ('LTC', 'BUSD'),
-            ('XRP', 'BUSD'),
-            ('DOGE', 'BUSD'),
-            
-            # USDT pairs
-            ('ADA', 'USDT'),
-            ('DOT', 'USDT'),
-            ('LINK', 'USDT'),
-            ('UNI', 'USDT'),
-            ('MATIC', 'USDT'),
-            ('AVAX', 'USDT'),
-            ('SOL', 'USDT'),
-            ('LTC', 'USDT'),
-            ('XRP', 'USDT'),
-            ('DOGE', 'USDT')
-        ]
+        # One gas price per scan, shared by every route and the execution that follows
+        try:
+            self.gas_price = self.w3.eth.gas_price
+        except Exception as e:
+            logger.debug("Gas price refresh failed, keeping %d: %s", self.gas_price, e)
+            
+        try:
+            self.current_block = self.w3.eth.block_number
+        except Exception as e:
+            logger.debug("Block number refresh failed, keeping %d: %s", self.current_block, e)
+            
+        # Only pairs not seen before cost an RPC (one multicall, normally just on the first scan)
+        self.resolve_pair_addresses([
+            (token_a, token_b) for _, _, token_a, token_b, _ in self.priority_pairs
+        ])
         
-        for token_a_symbol, token_b_symbol in priority_pairs:
-            if token_a_symbol not in self.tokens or token_b_symbol not in self.tokens:
-                continue
-                
-            token_a = self.tokens[token_a_symbol]
-            token_b = self.tokens[token_b_symbol]
+        # The first scan is a full one, so every pair has a score before any are skipped.
+        # Ties (e.g. all 0 while nothing pays) keep the list's liquidity order
+        scan_pairs = self.priority_pairs
+        if self.stats['scans_completed'] % self.full_scan_every and self.top_pairs < len(scan_pairs):
+            scan_pairs = heapq.nlargest(
+                self.top_pairs, scan_pairs, key=lambda pair: self._pair_scores.get(pair[:2], 0.0)
+            )
             
-            # Get pair for flashloan
-            pair_address = self.get_pair_address(token_a, token_b)
-            if not pair_address:
+        candidates = []
+        pair_keys = {}
+        for token_a_symbol, token_b_symbol, token_a, token_b, a_is_token0 in scan_pairs:
+            # Get pair for flashloan - once per pool, even if two symbol pairs resolve to the same one
+            # (aliased token addresses), so no pool's quotes are fetched twice
+            pair_address = self.pair_cache.get(pair_cache_key(token_a, token_b))
+            if not pair_address or pair_address in pair_keys:
                 continue
                 
-            pair_info = self.get_pair_info(pair_address)
+            candidates.append((token_a_symbol, token_b_symbol, token_a, token_b, a_is_token0, pair_address))
+            pair_keys[pair_address] = (token_a_symbol, token_b_symbol)
+            
+        # Token info and reserves for every pair in a single round trip
+        pairs_info = self.get_pairs_info([candidate[5] for candidate in candidates])
+        
+        # First legs: every DEX quote for both directions of every pair in one batch
+        scans = []
+        quote_calls = []
+        for token_a_symbol, token_b_symbol, token_a, token_b, a_is_token0, pair_address in candidates:
+            pair_info = pairs_info.get(pair_address)
             if not pair_info:
                 continue
                 
             # Calculate reasonable flashloan amounts
             smaller_reserve = min(pair_info['reserve0'], pair_info['reserve1'])
             flashloan_amount = min(
-                int(smaller_reserve * 0.05),  # 5% of smaller reserve
-                int(1000 * 1e18)  # Or $1000 equivalent
+                smaller_reserve // 20,  # 5% of smaller reserve
+                1000 * 10**18  # Or $1000 equivalent
             )
             
-            if flashloan_amount < int(100 * 1e18):  # Skip if less than $100
+            if flashloan_amount < 100 * 10**18:  # Skip if less than $100
                 continue
                 
-            logger.info(f"Checking {token_a_symbol}/{token_b_symbol}")
-            logger.info(f"  Pair: {pair_address}")
-            logger.info(f"  Reserves: {pair_info['reserve0']:,} / {pair_info['reserve1']:,}")
-            logger.info(f"  Testing amount: {flashloan_amount:,}")
+            # Per-pair detail is debug-only, with lazy %-formatting so INFO runs don't build the strings
+            logger.debug("Checking %s/%s", token_a_symbol, token_b_symbol)
+            logger.debug("  Pair: %s", pair_address)
+            logger.debug("  Reserves: %d / %d", pair_info['reserve0'], pair_info['reserve1'])
+            logger.debug("  Testing amount: %d", flashloan_amount)
             
             # Test both directions
             directions = [
-                (token_a, token_b, token_a_symbol, token_b_symbol),
-                (token_b, token_a, token_b_symbol, token_a_symbol)
+                (token_a, token_b, token_a_symbol, token_b_symbol, a_is_token0),
+                (token_b, token_a, token_b_symbol, token_a_symbol, not a_is_token0)
             ]
             
-            for token_borrow, token_target, borrow_symbol, target_symbol in directions:
-                # Get prices from all DEXes
-                dex_prices = {}
-                
-                for dex_name, router_address in self.dex_routers.items():
-                    amount_out = self.get_router_price(
-                        router_address, 
-                        flashloan_amount,
-                        token_borrow,
-                        token_target
-                    )
+            # Return amounts that pass the profit thresholds - exactly, in integers:
+            # gross * 10000 >= amount * min_bps  <=>  gross >= ceil(amount * min_bps / 10000)
+            min_return = flashloan_amount + max(1, -(-flashloan_amount * self.min_profit_bps // 10000))
+            max_return = flashloan_amount + flashloan_amount * self.max_profit_bps // 10000
+            
+            for token_borrow, token_target, borrow_symbol, target_symbol, borrow_is_token0 in directions:
+                scans.append((pair_address, borrow_is_token0, flashloan_amount, min_return, max_return,
+                              token_borrow, token_target, borrow_symbol, target_symbol))
+                calldata = encode_get_amounts_out(
+                    flashloan_amount, self.token_addrs_raw[token_borrow], self.token_addrs_raw[token_target]
+                )
+                for router_address in self.dex_routers.values():
+                    quote_calls.append((router_address, calldata))
                     
-                    if amount_out:
-                        price = float(amount_out) / float(flashloan_amount)
-                        dex_prices[dex_name] = {
-                            'router': router_address,
-                            'amount_out': amount_out,
-                            'price': price
-                        }
+        first_legs = self.get_router_prices(quote_calls)
+        
+        # Return legs depend on the first-leg output, so they go in a second batch
+        dex_count = len(self.dex_routers)
+        routes = []
+        return_calls = []
+        for n, scan in enumerate(scans):
+            flashloan_amount, token_borrow, token_target = scan[2], scan[5], scan[6]
+            
+            # Get prices from all DEXes
+            dex_prices = {}
+            
+            for k, (dex_name, router_address) in enumerate(self.dex_routers.items()):
+                amount_out = first_legs[n * dex_count + k]
                 
-                if len(dex_prices) < 2:
-                    continue
-                    
-                # Find best arbitrage
-                dex_names = list(dex_prices.keys())
+                if amount_out:
+                    dex_prices[dex_name] = {
+                        'router': router_address,
+                        'amount_out': amount_out
+                    }
+            
+            if len(dex_prices) < 2:
+                continue
                 
-                for i in range(len(dex_names)):
-                    for j in range(i + 1, len(dex_names)):
-                        dex_buy = dex_names[i]
-                        dex_sell = dex_names[j]
-                        
-                        buy_data = dex_prices[dex_buy]
-                        sell_data = dex_prices[dex_sell]
-                        
-                        # We buy token_target with token_borrow, then sell back
-                        target_amount = buy_data['amount_out']
-                        
-                        # Get return amount when selling target back to borrow token
-                        return_amount = self.get_router_price(
-                            sell_data['router'],
-                            target_amount,
-                            token_target,
-                            token_borrow
+            # Find best arbitrage
+            dex_names = list(dex_prices.keys())
+            
+            for i in range(len(dex_names)):
+                for j in range(i + 1, len(dex_names)):
+                    dex_buy = dex_names[i]
+                    dex_sell = dex_names[j]
+                    
+                    buy_data = dex_prices[dex_buy]
+                    sell_data = dex_prices[dex_sell]
+                    
+                    # We buy token_target with token_borrow, then sell back
+                    routes.append((scan, dex_buy, dex_sell, buy_data, sell_data))
+                    return_calls.append((
+                        sell_data['router'],
+                        encode_get_amounts_out(
+                            buy_data['amount_out'], self.token_addrs_raw[token_target], self.token_addrs_raw[token_borrow]
                         )
-                        
-                        if not return_amount:
-                            continue
-                            
-                        # Calculate profit
-                        if return_amount > flashloan_amount:
-                            gross_profit = return_amount - flashloan_amount
-                            profit_percentage = float(gross_profit) / float(flashloan_amount)
-                            
-                            # Apply fees (0.3% flashloan + gas)
-                            flashloan_fee = int(flashloan_amount * 0.003)
-                            estimated_gas_cost_wei = int(300000 * self.w3.eth.gas_price)
-                            
-                            net_profit = gross_profit - flashloan_fee
-                            
-                            if (profit_percentage >= self.min_profit_threshold and 
-                                profit_percentage <= self.max_profit_threshold and
-                                net_profit > 0):
-                                
-                                # Determine amounts for flashswap
-                                if pair_info['token0'].lower() == token_borrow.lower():
-                                    amount0_out = flashloan_amount
-                                    amount1_out = 0
-                                else:
-                                    amount0_out = 0
-                                    amount1_out = flashloan_amount
-                                
-                                opportunity = FlashloanOpportunity(
-                                    token_borrow=token_borrow,
-                                    token_target=token_target,
-                                    token_borrow_symbol=borrow_symbol,
-                                    token_target_symbol=target_symbol,
-                                    amount_borrow=flashloan_amount,
-                                    pair_address=pair_address,
-                                    amount0_out=amount0_out,
-                                    amount1_out=amount1_out,
-                                    buy_router=buy_data['router'],
-                                    sell_router=sell_data['router'],
-                                    buy_price=buy_data['price'],
-                                    sell_price=float(return_amount) / float(target_amount),
-                                    profit_percentage=profit_percentage,
-                                    estimated_profit_amount=int(net_profit),
-                                    estimated_gas=300000
-                                )
-                                
-                                opportunities.append(opportunity)
-                                
-                                logger.info(f"[OPPORTUNITY] {borrow_symbol} -> {target_symbol}")
-                                logger.info(f"  Profit: {profit_percentage:.2%}")
-                                logger.info(f"  Buy on: {dex_buy}")
-                                logger.info(f"  Sell on: {dex_sell}")
-                                logger.info(f"  Net profit: {net_profit:,}")
-        
-        return opportunities
+                    ))
+                    
+        return_legs = self.get_router_prices(return_calls)
+        
+        for (scan, dex_buy, dex_sell, buy_data, sell_data), return_amount in zip(routes, return_legs):
+            if not return_amount or not scan[3] <= return_amount <= scan[4]:
+                continue
+                
+            (pair_address, borrow_is_token0, flashloan_amount, _, _,
+             token_borrow, token_target, borrow_symbol, target_symbol) = scan
+            target_amount = buy_data['amount_out']
+                
+            # Calculate profit (0.3% flashloan fee; the window above already applied the thresholds)
+            gross_profit = return_amount - flashloan_amount
+            flashloan_fee = flashloan_amount * 3 // 1000
+            net_profit = gross_profit - flashloan_fee
+            if net_profit <= 0:
+                continue
+                
+            # Determine amounts for flashswap
+            if borrow_is_token0:
+                amount0_out = flashloan_amount
+                amount1_out = 0
+            else:
+                amount0_out = 0
+                amount1_out = flashloan_amount
+            
+            # Floats only from here on, for the report
+            profit_percentage = gross_profit / flashloan_amount
+            
+            opportunity = FlashloanOpportunity(
+                token_borrow=token_borrow,
+                token_target=token_target,
+                token_borrow_symbol=borrow_symbol,
+                token_target_symbol=target_symbol,
+                amount_borrow=flashloan_amount,
+                pair_address=pair_address,
+                amount0_out=amount0_out,
+                amount1_out=amount1_out,
+                buy_router=buy_data['router'],
+                sell_router=sell_data['router'],
+                buy_price=target_amount / flashloan_amount,
+                sell_price=return_amount / target_amount,
+                profit_percentage=profit_percentage,
+                estimated_profit_amount=net_profit,
+                estimated_gas=300000
+            )
+            
+            opportunities.append(opportunity)
+            profitable_count += 1  # net_profit > 0 is already guaranteed above
+            
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"[OPPORTUNITY] {borrow_symbol} -> {target_symbol}")
+                logger.info(f"  Profit: {profit_percentage:.2%}")
+                logger.info(f"  Buy on: {dex_buy}")
+                logger.info(f"  Sell on: {dex_sell}")
+                logger.info(f"  Net profit: {net_profit:,}")
+        
+        # Fold this scan's best profit per pair into its score (0 when nothing was found)
+        profits = {(token_a_symbol, token_b_symbol): 0.0 for token_a_symbol, token_b_symbol, _, _, _ in scan_pairs}
+        for opportunity in opportunities:
+            key = pair_keys[opportunity.pair_address]
+            profits[key] = max(profits[key], opportunity.profit_percentage)
+        for key, profit in profits.items():
+            self._pair_scores[key] = 0.9 * self._pair_scores.get(key, 0.0) + 0.1 * profit
+            
+        return opportunities, profitable_count
         
     def execute_flashloan_arbitrage(self, opportunity: FlashloanOpportunity) -> bool:
         """Execute flashloan arbitrage"""
@@ -660,8 +1036,12 @@ class ProductionFlashloanArbitrage:
             logger.info(f"  Pair: {opportunity.token_borrow_symbol}/{opportunity.token_target_symbol}")
             logger.info(f"  Expected profit: {opportunity.profit_percentage:.2%}")
             
-            # Build transaction
-            gas_price = self.w3.eth.gas_price
+            # Build transaction - gas price is this scan's, and the nonce is only fetched
+            # from the node when the local one can't be trusted
+            gas_price = self.gas_price
+            if self._nonce_resync_needed:
+                self._local_nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
+                self._nonce_resync_needed = False
             
             transaction = self.flashloan_contract.functions.executeFlashloanArbitrage(
                 opportunity.pair_address,
@@ -675,7 +1055,8 @@ class ProductionFlashloanArbitrage:
                 'from': self.account.address,
                 'gas': opportunity.estimated_gas,
                 'gasPrice': gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address)
+                'chainId': self.chain_id,
+                'nonce': self._local_nonce
             })
             
             # Sign and send
@@ -686,6 +1067,7 @@ class ProductionFlashloanArbitrage:
             if raw_tx is None:
                 raise Exception("Cannot access raw transaction data")
             tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
+            self._local_nonce += 1  # Used whether the transaction succeeds or reverts
             
             logger.info(f"[TX] Flashloan transaction sent: {tx_hash.hex()}")
             
@@ -694,14 +1076,14 @@ class ProductionFlashloanArbitrage:
             
             if receipt.status == 1:
                 gas_used = receipt.gasUsed
-                gas_cost = self.w3.from_wei(gas_used * gas_price, 'ether')
+                gas_cost = gas_used * gas_price / 1e18
                 
                 logger.info(f"✅ [SUCCESS] Flashloan arbitrage executed!")
                 logger.info(f"   Gas used: {gas_used:,}")
                 logger.info(f"   Gas cost: {gas_cost:.6f} BNB")
                 
                 self.stats['successful_arbitrages'] += 1
-                self.stats['total_gas_spent_bnb'] += float(gas_cost)
+                self.stats['total_gas_spent_bnb'] += gas_cost
                 
                 return True
             else:
@@ -711,19 +1093,50 @@ class ProductionFlashloanArbitrage:
                 
         except Exception as e:
             logger.error(f"❌ [ERROR] Flashloan execution error: {e}")
+            self._nonce_resync_needed = True  # The nonce may or may not have been used
             self.stats['failed_arbitrages'] += 1
             return False
             
+    def _wait_for_next_block(self, last_block: int, timeout: float) -> int:
+        """Wait until the chain moves past last_block, or timeout seconds pass without a new block"""
+        deadline = time.monotonic() + timeout
+        
+        # Pushed heads wake the scan as soon as a block lands; polling covers a dropped feed
+        if self.heads is not None and self.heads.connected:
+            block = self.heads.wait_past(last_block, timeout)
+            if block > last_block:
+                return block
+                
+        while time.monotonic() < deadline:
+            try:
+                block = self.w3.eth.block_number
+                if block > last_block:
+                    return block
+            except Exception as e:
+                logger.debug("Block number error: %s", e)
+                
+            time.sleep(self.block_poll_interval)
+            
+        return last_block
+        
     def run_production_scanner(self):
         """Run production flashloan arbitrage scanner"""
-        scan_interval = int(os.getenv('SCAN_INTERVAL', '30'))  # 30 seconds
+        scan_interval = self.scan_interval
         
         logger.info("🚀 Starting Production BSC Flashloan Arbitrage Scanner")
-        logger.info(f"Scan interval: {scan_interval}s")
+        if self.ws_url:
+            logger.info(f"Scanning on every new block (falling back to every {scan_interval}s if blocks stall)")
+        else:
+            logger.info(f"Scan interval: {scan_interval}s")
         logger.info(f"Min profit threshold: {self.min_profit_threshold:.1%}")
         logger.info(f"Max profit threshold: {self.max_profit_threshold:.1%}")
         
         scan_count = 0
+        last_block = self.w3.eth.block_number if self.ws_url else 0
+        if self.ws_url:
+            self.heads = NewHeadsFollower(self.ws_url)
+            self.heads.start()
+        next_tick = time.monotonic()  # Fixed-interval schedule, so scan time doesn't add to the cadence
         
         try:
             while True:
@@ -731,36 +1144,32 @@ class ProductionFlashloanArbitrage:
                 scan_count += 1
                 
                 logger.info("=" * 80)
-                logger.info(f"Production Flashloan Scan #{scan_count}")
+                logger.info("Production Flashloan Scan #%d", scan_count)
                 
                 # Find opportunities
-                opportunities = self.find_arbitrage_opportunities()
+                opportunities, profitable_count = self.find_arbitrage_opportunities()
                 
                 if opportunities:
-                    logger.info(f"Found {len(opportunities)} flashloan opportunities!")
+                    logger.info("Found %d flashloan opportunities!", len(opportunities))
                     
-                    # Sort by profit percentage
-                    opportunities.sort(key=lambda x: x.profit_percentage, reverse=True)
+                    # Only the best opportunity is executed, so pick it in one pass instead of sorting
+                    best = max(opportunities, key=lambda x: x.profit_percentage)
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info(
+                            f"Best: {best.token_borrow_symbol} -> {best.token_target_symbol}\n"
+                            f"    Profit: {best.profit_percentage:.2%}\n"
+                            f"    Amount: {best.amount_borrow:,}\n"
+                            f"    Est. profit: {best.estimated_profit_amount:,}"
+                        )
                     
-                    for i, opp in enumerate(opportunities, 1):
-                        logger.info(f"[{i}] {opp.token_borrow_symbol} -> {opp.token_target_symbol}")
-                        logger.info(f"    Profit: {opp.profit_percentage:.2%}")
-                        logger.info(f"    Amount: {opp.amount_borrow:,}")
-                        logger.info(f"    Est. profit: {opp.estimated_profit_amount:,}")
-                        
-                        # Execute the most profitable opportunity
-                        if i == 1:  # Execute only the best opportunity
-                            self.stats['flashloans_executed'] += 1
-                            success = self.execute_flashloan_arbitrage(opp)
-                            
-                            if success:
-                                logger.info("✅ Flashloan executed successfully!")
-                                break  # Exit after successful execution
-                            else:
-                                logger.warning("❌ Flashloan execution failed")
+                    self.stats['flashloans_executed'] += 1
+                    if self.execute_flashloan_arbitrage(best):
+                        logger.info("✅ Flashloan executed successfully!")
+                    else:
+                        logger.warning("❌ Flashloan execution failed")
                     
                     self.stats['opportunities_found'] += len(opportunities)
-                    self.stats['profitable_opportunities'] += len([o for o in opportunities if o.estimated_profit_amount > 0])
+                    self.stats['profitable_opportunities'] += profitable_count
                     
                 else:
                     logger.info("No profitable flashloan opportunities found")
@@ -768,20 +1177,22 @@ class ProductionFlashloanArbitrage:
                 self.stats['scans_completed'] += 1
                 scan_time = time.time() - start_time
                 
-                # Print statistics
-                logger.info(f"Scan completed in {scan_time:.2f}s")
-                logger.info("Session Statistics:")
-                logger.info(f"  Scans: {self.stats['scans_completed']}")
-                logger.info(f"  Opportunities found: {self.stats['opportunities_found']}")
-                logger.info(f"  Profitable opportunities: {self.stats['profitable_opportunities']}")
-                logger.info(f"  Flashloans executed: {self.stats['flashloans_executed']}")
-                logger.info(f"  Successful arbitrages: {self.stats['successful_arbitrages']}")
-                logger.info(f"  Failed arbitrages: {self.stats['failed_arbitrages']}")
-                logger.info(f"  Total gas spent: {self.stats['total_gas_spent_bnb']:.6f} BNB")
+                # Print statistics (one record, only formatted if INFO is enabled)
+                logger.info("Scan completed in %.2fs", scan_time)
+                logger.info(STATS_TEMPLATE, self.stats)
                 
-                # Wait for next scan
-                logger.info(f"Waiting {scan_interval}s for next scan...")
-                time.sleep(scan_interval)
+                # Wait for next scan - the next block when on a WebSocket, otherwise the fixed interval
+                if self.ws_url:
+                    last_block = self._wait_for_next_block(last_block, scan_interval)
+                else:
+                    next_tick += scan_interval
+                    sleep_time = next_tick - time.monotonic()
+                    if sleep_time > 0:
+                        logger.info("Waiting %.1fs for next scan...", sleep_time)
+                        time.sleep(sleep_time)
+                    else:
+                        logger.warning("Scan overran the %ss interval by %.2fs", scan_interval, -sleep_time)
+                        next_tick = time.monotonic()
                 
         except KeyboardInterrupt:
             logger.info("Production scanner stopped by user")
@@ -3,13 +3,36 @@ Simple test to verify the deployed flashloan contract
 """
 import os
 from web3 import Web3
-from dotenv import load_dotenv
+from bsc_client import W3
 
-load_dotenv()
+# Owner getters the contract might expose, tried in order
+OWNER_FUNCTION_ABIS = [
+    {
+        "inputs": [],
+        "name": "owner",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "getOwner", 
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "_owner",
+        "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
 
 def test_contract():
     # Setup Web3
-    w3 = Web3(Web3.HTTPProvider('https://bsc-dataseed1.binance.org/'))
+    w3 = W3  # Shared connection
     print(f"Connected to BSC: Block {w3.eth.block_number}")
     
     # Contract details
@@ -31,34 +54,9 @@ def test_contract():
         # Check transaction that created the contract
         print(f"\nChecking if this address has any transaction history...")
         balance = w3.eth.get_balance(contract_address)
-        print(f"Contract balance: {w3.from_wei(balance, 'ether')} BNB")
+        print(f"Contract balance: {balance / 1e18} BNB")
         
-        # Try different function signatures that might exist
-        common_functions = [
-            {
-                "inputs": [],
-                "name": "owner",
-                "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                "stateMutability": "view",
-                "type": "function"
-            },
-            {
-                "inputs": [],
-                "name": "getOwner", 
-                "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                "stateMutability": "view",
-                "type": "function"
-            },
-            {
-                "inputs": [],
-                "name": "_owner",
-                "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-                "stateMutability": "view",
-                "type": "function"
-            }
-        ]
-        
-        for func_abi in common_functions:
+        for func_abi in OWNER_FUNCTION_ABIS:
             try:
                 abi = [func_abi]
                 contract = w3.eth.contract(
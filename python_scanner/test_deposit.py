@@ -2,18 +2,16 @@
 Test depositing tokens into the new BSC contract for arbitrage testing
 """
 
-import os
-from web3 import Web3
-from dotenv import load_dotenv
-
-load_dotenv()
+from eth_abi import decode
+from multicall import multicall
+from addresses import BUSD, CONTRACT_SIMPLE
+from bsc_client import W3, ACCOUNT, BUSD_CONTRACT, SIMPLE_CONTRACT, rpc_call
 
 def test_deposit():
     """Test depositing BUSD into the contract"""
     
-    # Setup Web3
-    rpc_url = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    # Shared Web3 connection
+    w3 = W3
     
     if not w3.is_connected():
         print("❌ Failed to connect to BSC")
@@ -22,93 +20,37 @@ def test_deposit():
     print(f"✅ Connected to BSC: Block {w3.eth.block_number}")
     
     # Setup account
-    private_key = os.getenv('PRIVATE_KEY')
-    if not private_key:
+    account = ACCOUNT
+    if account is None:
         print("❌ No private key found")
         return False
     
-    account = w3.eth.account.from_key(private_key)
     print(f"✅ Account: {account.address}")
     
     # Check BNB balance
-    balance = w3.eth.get_balance(account.address)
-    balance_bnb = w3.from_wei(balance, 'ether')
+    balance = rpc_call(w3.eth.get_balance, account.address)
+    balance_bnb = balance / 1e18
     print(f"✅ BNB Balance: {balance_bnb:.4f} BNB")
     
     # Contract details
-    contract_address = '0xfe9cfddc6270480507E810C4F2a1EA16a88F90cc'
-    busd_address = '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56'
-    
-    # BUSD contract ABI (minimal)
-    busd_abi = [
-        {
-            "inputs": [{"internalType": "address", "name": "account", "type": "address"}],
-            "name": "balanceOf",
-            "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"internalType": "address", "name": "to", "type": "address"},
-                {"internalType": "uint256", "name": "amount", "type": "uint256"}
-            ],
-            "name": "transfer",
-            "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"internalType": "address", "name": "spender", "type": "address"},
-                {"internalType": "uint256", "name": "amount", "type": "uint256"}
-            ],
-            "name": "approve",
-            "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        }
-    ]
-    
-    # Contract ABI (minimal)
-    contract_abi = [
-        {
-            "inputs": [
-                {"internalType": "address", "name": "token", "type": "address"},
-                {"internalType": "uint256", "name": "amount", "type": "uint256"}
-            ],
-            "name": "depositToken",
-            "outputs": [],
-            "stateMutability": "nonpayable",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"internalType": "address", "name": "token", "type": "address"}
-            ],
-            "name": "getTokenBalance",
-            "outputs": [
-                {"internalType": "uint256", "name": "", "type": "uint256"}
-            ],
-            "stateMutability": "view",
-            "type": "function"
-        }
-    ]
+    contract_address = CONTRACT_SIMPLE
+    busd_address = BUSD
     
     try:
-        # Setup contracts
-        busd_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(busd_address),
-            abi=busd_abi
-        )
+        busd_contract = BUSD_CONTRACT
+        arbitrage_contract = SIMPLE_CONTRACT
         
-        arbitrage_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(contract_address),
-            abi=contract_abi
-        )
+        # Account and contract BUSD balances in one Multicall3 round-trip (encodeABI gives hex, aggregate3 wants bytes)
+        busd_result, contract_result = rpc_call(multicall, w3, [
+            (busd_contract.address, bytes.fromhex(busd_contract.encodeABI(fn_name='balanceOf', args=[account.address])[2:])),
+            (arbitrage_contract.address, bytes.fromhex(arbitrage_contract.encodeABI(fn_name='getTokenBalance', args=[busd_address])[2:]))
+        ])
+        if busd_result is None or contract_result is None:
+            print("❌ Balance lookup reverted")
+            return False
         
         # Check BUSD balance in account
-        busd_balance = busd_contract.functions.balanceOf(account.address).call()
+        busd_balance = decode(['uint256'], busd_result)[0]
         busd_balance_formatted = busd_balance / 1e18
         print(f"✅ Account BUSD Balance: {busd_balance_formatted:.2f} BUSD")
         
@@ -118,7 +60,7 @@ def test_deposit():
             return True
         
         # Check current contract balance
-        contract_busd_balance = arbitrage_contract.functions.getTokenBalance(busd_address).call()
+        contract_busd_balance = decode(['uint256'], contract_result)[0]
         contract_busd_formatted = contract_busd_balance / 1e18
         print(f"✅ Contract BUSD Balance: {contract_busd_formatted:.2f} BUSD")
         
@@ -2,18 +2,76 @@
 Test the new BSC V2 contract with flashloans
 """
 
-import os
+import requests
 from web3 import Web3
-from dotenv import load_dotenv
+from eth_abi import decode, encode
+from addresses import BUSD, USDC, PANCAKE_ROUTER, BISWAP_ROUTER, CONTRACT_V2
+from bsc_client import W3, SESSION, V2_CONTRACT, rpc_call
 
-load_dotenv()
+# checkProfitability(address,address,uint256,address,address) - calldata is built straight from it
+CHECK_PROFITABILITY_SELECTOR = Web3.keccak(text='checkProfitability(address,address,uint256,address,address)')[:4]
+CHECK_PROFITABILITY_TYPES = ['address', 'address', 'uint256', 'address', 'address']
+
+# The amount is the third argument word: selector (4 bytes) + two address words
+_AMOUNT_WORD = slice(4 + 2 * 32, 4 + 3 * 32)
+
+def check_profitability_calldata(skeletons, token_borrow, token_target, amount, buy_router, sell_router) -> str:
+    """checkProfitability calldata, ABI-encoding each route once and splicing in the amount per call"""
+    key = (token_borrow, token_target, buy_router, sell_router)
+    skeleton = skeletons.get(key)
+    if skeleton is None:
+        skeleton = skeletons[key] = bytearray(
+            CHECK_PROFITABILITY_SELECTOR
+            + encode(CHECK_PROFITABILITY_TYPES, [token_borrow, token_target, 0, buy_router, sell_router])
+        )
+    skeleton[_AMOUNT_WORD] = amount.to_bytes(32, 'big')
+    return '0x' + skeleton.hex()
+
+# Max eth_calls per JSON-RPC batch (stays under typical BSC node request/response limits)
+MAX_BATCH = 50
+
+def batch_check_profitability(w3, contract, candidates, session=None):
+    """Run checkProfitability for every (tokenBorrow, tokenTarget, amount, buyRouter, sellRouter)
+    candidate via JSON-RPC batches, returning (profit, profitable) or None per candidate"""
+    session = session or requests.Session()
+    rpc_url = w3.provider.endpoint_uri
+    skeletons = {}  # Route -> encoded calldata, shared by every amount probed on it
+    results = []
+    
+    for start in range(0, len(candidates), MAX_BATCH):
+        chunk = candidates[start:start + MAX_BATCH]
+        payload = [
+            {
+                'jsonrpc': '2.0',
+                'id': n,
+                'method': 'eth_call',
+                'params': [
+                    {'to': contract.address, 'data': check_profitability_calldata(skeletons, *args)},
+                    'latest'
+                ]
+            }
+            for n, args in enumerate(chunk)
+        ]
+        
+        response = session.post(rpc_url, json=payload, timeout=10)
+        response.raise_for_status()
+        # Batch responses may come back in any order
+        replies = {reply.get('id'): reply for reply in response.json()}
+        
+        for n in range(len(chunk)):
+            result = replies.get(n, {}).get('result')
+            if result and len(result) > 2:
+                results.append(tuple(decode(['uint256', 'bool'], bytes.fromhex(result[2:]))))
+            else:
+                results.append(None)
+                
+    return results
 
 def test_v2_contract():
     """Test the newly deployed BSC V2 contract with flashloans"""
     
-    # Setup Web3
-    rpc_url = os.getenv('BSC_RPC_URL', 'https://bsc-dataseed1.binance.org/')
-    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    # Shared Web3 connection
+    w3 = W3
     
     if not w3.is_connected():
         print("❌ Failed to connect to BSC")
@@ -22,97 +80,64 @@ def test_v2_contract():
     print(f"✅ Connected to BSC: Block {w3.eth.block_number}")
     
     # New V2 contract details
-    contract_address = '0x86742335Ec7CC7bBaa7d4244841c315Cf1978eAE'
-    
-    # Contract ABI for testing
-    abi = [
-        {
-            "inputs": [],
-            "name": "owner",
-            "outputs": [{"internalType": "address", "name": "", "type": "address"}],
-            "stateMutability": "view",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"internalType": "address", "name": "tokenA", "type": "address"},
-                {"internalType": "address", "name": "tokenB", "type": "address"}
-            ],
-            "name": "getPairAddress",
-            "outputs": [
-                {"internalType": "address", "name": "pair", "type": "address"}
-            ],
-            "stateMutability": "pure",
-            "type": "function"
-        },
-        {
-            "inputs": [
-                {"internalType": "address", "name": "tokenBorrow", "type": "address"},
-                {"internalType": "address", "name": "tokenTarget", "type": "address"},
-                {"internalType": "uint256", "name": "amount", "type": "uint256"},
-                {"internalType": "address", "name": "buyRouter", "type": "address"},
-                {"internalType": "address", "name": "sellRouter", "type": "address"}
-            ],
-            "name": "checkProfitability",
-            "outputs": [
-                {"internalType": "uint256", "name": "profit", "type": "uint256"},
-                {"internalType": "bool", "name": "profitable", "type": "bool"}
-            ],
-            "stateMutability": "view",
-            "type": "function"
-        }
-    ]
+    contract_address = CONTRACT_V2
     
     try:
-        contract = w3.eth.contract(
-            address=Web3.to_checksum_address(contract_address),
-            abi=abi
-        )
+        contract = V2_CONTRACT
         
         print(f"✅ V2 Contract loaded: {contract_address}")
         
         # Test 1: Check owner
         try:
-            owner = contract.functions.owner().call()
+            owner = rpc_call(contract.functions.owner().call)
             print(f"✅ Contract owner: {owner}")
         except Exception as e:
             print(f"❌ Failed to get owner: {e}")
             return False
         
         # Test 2: Get pair address for BUSD/USDC
-        busd_address = '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56'
-        usdc_address = '0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d'
+        busd_address = BUSD
+        usdc_address = USDC
         
         try:
-            pair_address = contract.functions.getPairAddress(busd_address, usdc_address).call()
+            pair_address = rpc_call(contract.functions.getPairAddress(busd_address, usdc_address).call)
             print(f"✅ BUSD/USDC Pair: {pair_address}")
         except Exception as e:
             print(f"❌ Failed to get pair address: {e}")
             return False
         
-        # Test 3: Check profitability
-        pancake_router = '0x10ED43C718714eb63d5aA57B78B54704E256024E'
-        biswap_router = '0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8'
-        amount = int(1e18)  # 1 BUSD
+        # Test 3: Check profitability (both router directions, a few sizes, one batched request)
+        pancake_router = PANCAKE_ROUTER
+        biswap_router = BISWAP_ROUTER
+        amounts = [int(1e18), int(10e18), int(100e18)]  # 1 / 10 / 100 BUSD
+        candidates = [
+            (busd_address, usdc_address, amount, buy_router, sell_router)
+            for amount in amounts
+            for buy_router, sell_router in ((biswap_router, pancake_router), (pancake_router, biswap_router))
+        ]
         
         try:
-            profit, profitable = contract.functions.checkProfitability(
-                busd_address,
-                usdc_address,
-                amount,
-                biswap_router,
-                pancake_router
-            ).call()
+            results = rpc_call(batch_check_profitability, w3, contract, candidates, SESSION)
+        except Exception as e:
+            print(f"❌ Failed to check profitability: {e}")
+            return False
+            
+        if all(result is None for result in results):
+            print("❌ Failed to check profitability: every call reverted")
+            return False
             
-            print(f"✅ Profitability check - Profit: {profit}, Profitable: {profitable}")
+        for (_, _, amount, buy_router, _), result in zip(candidates, results):
+            route = "Biswap → PancakeSwap" if buy_router == biswap_router else "PancakeSwap → Biswap"
+            if result is None:
+                print(f"⚠️ {amount / 1e18:g} BUSD {route}: call reverted")
+                continue
+                
+            profit, profitable = result
+            print(f"✅ {amount / 1e18:g} BUSD {route} - Profit: {profit}, Profitable: {profitable}")
             
             if profit > 0:
                 profit_percentage = (profit / amount) * 100
                 print(f"✅ Estimated profit: {profit_percentage:.4f}%")
-            
-        except Exception as e:
-            print(f"❌ Failed to check profitability: {e}")
-            return False
         
         print("\n🎉 V2 Contract Tests Summary:")
         print(f"   • Contract: {contract_address}")
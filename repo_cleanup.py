@@ -6,8 +6,14 @@ Entfernt alle nicht mehr benötigten Dateien und Scripts
 
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+def remove_directory(dir_name: str) -> bool:
+    """Löscht ein Verzeichnis rekursiv, True wenn es danach weg ist"""
+    shutil.rmtree(dir_name, ignore_errors=True)
+    return not os.path.exists(dir_name)
+
 def cleanup_repository():
     """Räumt das Repository auf"""
     
@@ -70,10 +76,13 @@ def cleanup_repository():
     
     deleted_count = 0
     
+    # Ein einziger Verzeichnis-Scan statt eines exists()-Aufrufs pro Eintrag
+    present = {entry.name for entry in os.scandir('.')}
+    
     # Lösche Dateien
     print("\n🗑️  DELETING OBSOLETE FILES:")
     for file in files_to_delete:
-        if os.path.exists(file):
+        if file in present:
             try:
                 os.remove(file)
                 print(f"   ✅ Deleted: {file}")
@@ -83,18 +92,20 @@ def cleanup_repository():
         else:
             print(f"   ⚠️  Not found: {file}")
     
-    # Lösche Verzeichnisse
+    # Lösche Verzeichnisse - parallel, unlink() gibt die GIL frei
     print("\n📁 CLEANING DIRECTORIES:")
+    dirs_present = [dir_name for dir_name in dirs_to_clean if dir_name in present]
+    with ThreadPoolExecutor(max_workers=max(1, len(dirs_present))) as executor:
+        removed = dict(zip(dirs_present, executor.map(remove_directory, dirs_present)))
+    
     for dir_name in dirs_to_clean:
-        if os.path.exists(dir_name):
-            try:
-                shutil.rmtree(dir_name)
-                print(f"   ✅ Removed directory: {dir_name}")
-                deleted_count += 1
-            except Exception as e:
-                print(f"   ❌ Failed to remove {dir_name}: {e}")
-        else:
+        if dir_name not in removed:
             print(f"   ⚠️  Not found: {dir_name}")
+        elif removed[dir_name]:
+            print(f"   ✅ Removed directory: {dir_name}")
+            deleted_count += 1
+        else:
+            print(f"   ❌ Failed to remove {dir_name}")
     
     print(f"\n📊 CLEANUP SUMMARY:")
     print(f"   🗑️  Files/Dirs deleted: {deleted_count}")
@@ -120,7 +131,7 @@ def cleanup_repository():
     ]
     
     for file in core_files:
-        if os.path.exists(file):
+        if file in present:
             print(f"   ✅ {file}")
         else:
             print(f"   ❌ MISSING: {file}")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Shared RPC helpers for the live trade test scripts
+Unabhängige Reads gehen als ein JSON-RPC Batch raus - ein Round-Trip statt einem pro Call
+"""
+
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+import asyncio
+import json
+import os
+import sys
+import time
+import requests
+import websockets
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from web3 import Web3
+from web3.exceptions import TimeExhausted, TransactionNotFound
+from eth_abi import decode
+
+# python_scanner/ Module importieren sich gegenseitig direkt - angehängt, damit sie keine Root-Module verdecken
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python_scanner'))
+from multicall import multicall
+
+# orjson parst deployed_contract.json deutlich schneller - stdlib json als Fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEPLOYED_CONTRACT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployed_contract.json')
+# Immutable contract constants (token/router addresses) per contract, next to deployed_contract.json
+CONSTANTS_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contract_constants.json')
+
+# BSC Blockzeit ~3s - Gas Preis und Blocknummer gelten so lange
+CACHE_TTL = 3.0
+# (endpoint, method) -> (time bucket, value)
+_TTL_CACHE: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+# Pooled keep-alive session - Web3 Provider und Batch-Requests teilen sich die warmen TLS Connections
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=16,
+    # Nur Verbindungsfehler wiederholen - ein Read-Retry würde ein schon gesendetes send_raw_transaction doppelt schicken
+    max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1, allowed_methods=None)
+))
+
+def connect(rpc_url: str) -> Web3:
+    """Web3 over HTTP on the shared pooled session"""
+    return Web3(Web3.HTTPProvider(rpc_url, session=SESSION, request_kwargs={'timeout': 15}))
+
+def rpc_batch(w3: Web3, calls: List[Tuple[str, list]]) -> List[dict]:
+    """Send (method, params) requests as one JSON-RPC batch, replies in request order"""
+    if not calls:
+        return []
+    
+    payload = [
+        {'jsonrpc': '2.0', 'id': n, 'method': method, 'params': params}
+        for n, (method, params) in enumerate(calls)
+    ]
+    response = SESSION.post(w3.provider.endpoint_uri, json=payload, timeout=15)
+    response.raise_for_status()
+    
+    # Batch replies may come back in any order
+    replies = {reply.get('id'): reply for reply in response.json()}
+    return [replies.get(n, {'error': {'message': 'missing reply'}}) for n in range(len(payload))]
+
+@lru_cache(maxsize=1)
+def deployed_abi() -> list:
+    """ABI from deployed_contract.json, parsed once"""
+    with open(DEPLOYED_CONTRACT_FILE, 'rb') as f:
+        raw = f.read()
+    return (orjson.loads(raw) if orjson else json.loads(raw))['abi']
+
+@lru_cache(maxsize=None)
+def load_contract(w3: Web3, address: str, functions: Optional[Tuple[str, ...]] = None):
+    """Contract at address with the deployed ABI, built once - optionally shrunk to the named functions"""
+    abi = deployed_abi()
+    if functions is not None:
+        # web3 validiert und normalisiert jeden ABI Eintrag - nur die benutzten Funktionen mitnehmen
+        abi = [item for item in abi if item.get('type') != 'function' or item['name'] in functions]
+    return w3.eth.contract(address=address, abi=abi)
+
+def rpc_int(reply: dict) -> int:
+    """Hex quantity result of a batch reply, ValueError with the node's message if the call failed"""
+    if 'result' not in reply:
+        raise ValueError(reply.get('error', {}).get('message', 'no result'))
+    return int(reply['result'], 16)
+
+def _cached_value(w3: Web3, method: str) -> Optional[int]:
+    """Value cached for method within the current CACHE_TTL bucket, else None"""
+    hit = _TTL_CACHE.get((w3.provider.endpoint_uri, method))
+    return hit[1] if hit and hit[0] == int(time.time() // CACHE_TTL) else None
+
+def _cache_value(w3: Web3, method: str, value: int) -> int:
+    _TTL_CACHE[(w3.provider.endpoint_uri, method)] = (int(time.time() // CACHE_TTL), value)
+    return value
+
+def get_block_number(w3: Web3) -> int:
+    """w3.eth.block_number, fetched at most once per CACHE_TTL seconds"""
+    cached = _cached_value(w3, 'eth_blockNumber')
+    return cached if cached is not None else _cache_value(w3, 'eth_blockNumber', w3.eth.block_number)
+
+def preflight_batch(w3: Web3, sender: str, tx: Optional[dict] = None) -> List[dict]:
+    """gasPrice, pending nonce, chainId and (for a {'to', 'data'} tx) estimateGas replies in one round-trip"""
+    # Mit chainId im Batch braucht build_transaction() selbst keinen RPC Call mehr
+    calls = [
+        ('eth_getTransactionCount', [sender, 'pending']),
+        ('eth_chainId', [])
+    ]
+    if tx is not None:
+        calls.append(('eth_estimateGas', [{'from': sender, **tx}]))
+        
+    # Gas Preis aus dem TTL Cache, wenn frisch - sonst mit in den Batch und danach cachen
+    gas_price = _cached_value(w3, 'eth_gasPrice')
+    if gas_price is not None:
+        return [{'result': hex(gas_price)}] + rpc_batch(w3, calls)
+        
+    replies = rpc_batch(w3, [('eth_gasPrice', [])] + calls)
+    if 'result' in replies[0]:
+        _cache_value(w3, 'eth_gasPrice', int(replies[0]['result'], 16))
+    return replies
+
+def batch_eth_call(w3: Web3, calls: List[Tuple[str, str]], block: str = 'latest',
+                   sender: Optional[str] = None) -> List[Optional[bytes]]:
+    """Run (to, data) eth_calls in one batch, None for each call that failed"""
+    extra = {'from': sender} if sender else {}
+    replies = rpc_batch(w3, [('eth_call', [{'to': to, 'data': data, **extra}, block]) for to, data in calls])
+    return [
+        bytes.fromhex(reply['result'][2:]) if reply.get('result') else None
+        for reply in replies
+    ]
+
+def batch_contract_calls(w3: Web3, contract, calls: List[Tuple[str, list]],
+                         sender: Optional[str] = None) -> List[Optional[object]]:
+    """Run (fn_name, args) contract calls in one batch, decoded like .call() - None for each that failed"""
+    results = batch_eth_call(
+        w3,
+        [(contract.address, contract.encodeABI(fn_name=name, args=list(args))) for name, args in calls],
+        sender=sender
+    )
+    
+    return [_decode_result(contract, name, result) for (name, _), result in zip(calls, results)]
+
+def _decode_result(contract, name: str, result: Optional[bytes]):
+    """Decode raw return data of contract.name like .call() would, None if the call failed"""
+    if result is None:
+        return None
+    types = [output['type'] for output in contract.get_function_by_name(name).abi['outputs']]
+    try:
+        decoded = [
+            Web3.to_checksum_address(value) if abi_type == 'address' else value
+            for abi_type, value in zip(types, decode(types, result))
+        ]
+    except Exception:
+        return None  # Leere/kaputte Rückgabe (z.B. kein Code an der Adresse)
+        
+    # Wie .call(): ein einzelner Wert direkt, mehrere als Liste
+    return decoded[0] if len(decoded) == 1 else decoded
+
+def multicall_contract_calls(w3: Web3, contract, calls: List[Tuple[str, list]]) -> List[Optional[object]]:
+    """Run (fn_name, args) view calls in one Multicall3 eth_call, decoded like .call() - None for each that reverted"""
+    # msg.sender ist hier der Multicall3 Contract - onlyOwner Funktionen gehören in batch_contract_calls()
+    results = multicall(w3, [
+        (contract.address, bytes.fromhex(contract.encodeABI(fn_name=name, args=list(args))[2:]))
+        for name, args in calls
+    ])
+    return [_decode_result(contract, name, result) for (name, _), result in zip(calls, results)]
+
+def read_address_constants(w3: Web3, contract, names: List[str]) -> Dict[str, str]:
+    """Read the contract's argument-less address getters (USDT(), BUSD(), ...) in one batch"""
+    results = batch_eth_call(w3, [(contract.address, contract.encodeABI(fn_name=name)) for name in names])
+    
+    constants = {}
+    for name, result in zip(names, results):
+        if not result or len(result) < 32:
+            raise ValueError(f"{name}() call failed")
+        constants[name] = Web3.to_checksum_address(decode(['address'], result)[0])
+    return constants
+
+def get_or_fetch_constants(w3: Web3, contract, names: List[str]) -> Dict[str, str]:
+    """Address constants from the on-disk cache, fetching (one batch) and caching only missing ones"""
+    try:
+        with open(CONSTANTS_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+        
+    # Die Getter sind immutable - einmal gelesen, für immer gültig
+    cached = cache.setdefault(contract.address, {})
+    missing = [name for name in names if name not in cached]
+    if missing:
+        cached.update(read_address_constants(w3, contract, missing))
+        with open(CONSTANTS_CACHE_FILE, 'w') as f:
+            json.dump(cache, f, indent=2)
+            
+    return {name: cached[name] for name in names}
+
+def _receipt_or_none(w3: Web3, tx_hash):
+    try:
+        return w3.eth.get_transaction_receipt(tx_hash)
+    except TransactionNotFound:
+        return None
+
+async def _receipt_on_new_heads(w3: Web3, ws_url: str, tx_hash):
+    # Eigener Socket - der sync WebsocketProvider von web3 kann keine Subscriptions
+    async with websockets.connect(ws_url, ping_interval=20) as ws:
+        await ws.send(json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads']}))
+        
+        # Einmal direkt prüfen - die TX kann schon vor dem Abo gemined worden sein
+        receipt = _receipt_or_none(w3, tx_hash)
+        while receipt is None:
+            if json.loads(await ws.recv()).get('method') == 'eth_subscription':
+                receipt = _receipt_or_none(w3, tx_hash)
+        return receipt
+
+def wait_receipt_ws(w3: Web3, tx_hash, timeout: float = 300):
+    """wait_for_transaction_receipt, but checking once per new block (newHeads on BSC_WS_URL) instead of polling"""
+    ws_url = os.getenv('BSC_WS_URL')
+    started = time.monotonic()
+    if ws_url:
+        try:
+            return asyncio.run(asyncio.wait_for(_receipt_on_new_heads(w3, ws_url, tx_hash), timeout))
+        except asyncio.TimeoutError:
+            raise TimeExhausted(f"Transaction {tx_hash.hex()} is not in the chain after {timeout} seconds")
+        except (OSError, websockets.WebSocketException) as e:
+            print(f"⚠️  newHeads subscription failed ({e}) - polling for receipt")
+            
+    # Kein WebSocket (oder abgebrochen): web3's normales Polling für die restliche Zeit
+    return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=max(timeout - (time.monotonic() - started), 0))
@@ -5,9 +5,8 @@ Verwendet die tatsächlich verfügbaren Contract-Funktionen
 """
 
 import os
-import json
-from web3 import Web3
 from dotenv import load_dotenv
+from rpc_client import connect, batch_contract_calls, get_block_number, get_or_fetch_constants, load_contract, preflight_batch, rpc_int, wait_receipt_ws
 
 print("🔥 CORRECTED LIVE TRADE TEST!")
 
@@ -16,8 +15,8 @@ load_dotenv()
 
 # Web3 Setup
 rpc_url = os.getenv('BSC_RPC_URL')
-w3 = Web3(Web3.HTTPProvider(rpc_url))
-print(f"✅ BSC verbunden - Block: {w3.eth.block_number}")
+w3 = connect(rpc_url)
+print(f"✅ BSC verbunden - Block: {get_block_number(w3)}")
 
 # Account Setup
 private_key = os.getenv('PRIVATE_KEY')
@@ -25,44 +24,48 @@ account = w3.eth.account.from_key(private_key)
 balance = w3.eth.get_balance(account.address)
 balance_bnb = w3.from_wei(balance, 'ether')
 
+# Lokal mitgezählte Nonce - nach jedem gesendeten Trade hochgezählt
+LOCAL_NONCE = 0
+
 print(f"💼 Account: {account.address}")
 print(f"💰 Balance: {balance_bnb:.6f} BNB")
 
 # Contract Setup
 contract_address = os.getenv('CONTRACT_ADDRESS')
-with open('deployed_contract.json', 'r') as f:
-    contract_info = json.load(f)
-
-abi = contract_info['abi']
-contract = w3.eth.contract(address=contract_address, abi=abi)
+contract = load_contract(w3, contract_address, (
+    'USDT', 'BUSD', 'WBNB', 'PANCAKESWAP_ROUTER', 'BISWAP_ROUTER', 'APESWAP_ROUTER',
+    'owner', 'getTokenBalance', 'checkArbitrageProfit', 'executeSimpleArbitrage'
+))
 
 print(f"📍 Contract: {contract_address}")
 
-# Token-Adressen aus Contract abrufen
-print("\n🪙 TOKEN ADDRESSES FROM CONTRACT:")
+# Token- und Router-Adressen aus Contract abrufen - aus dem Cache oder ein Batch statt sechs Calls
 try:
-    usdt_addr = contract.functions.USDT().call()
-    busd_addr = contract.functions.BUSD().call()
-    wbnb_addr = contract.functions.WBNB().call()
-    
-    print(f"USDT: {usdt_addr}")
-    print(f"BUSD: {busd_addr}")
-    print(f"WBNB: {wbnb_addr}")
+    constants = get_or_fetch_constants(w3, contract, [
+        'USDT', 'BUSD', 'WBNB', 'PANCAKESWAP_ROUTER', 'BISWAP_ROUTER', 'APESWAP_ROUTER'
+    ])
 except Exception as e:
-    print(f"⚠️  Token Address Fehler: {e}")
+    print(f"⚠️  Contract Address Fehler: {e}")
+    constants = {}
+
+print("\n🪙 TOKEN ADDRESSES FROM CONTRACT:")
+usdt_addr = constants.get('USDT')
+busd_addr = constants.get('BUSD')
+wbnb_addr = constants.get('WBNB')
+
+print(f"USDT: {usdt_addr}")
+print(f"BUSD: {busd_addr}")
+print(f"WBNB: {wbnb_addr}")
 
 # Router-Adressen aus Contract
 print("\n🔄 DEX ROUTERS FROM CONTRACT:")
-try:
-    pancake_router = contract.functions.PANCAKESWAP_ROUTER().call()
-    biswap_router = contract.functions.BISWAP_ROUTER().call()
-    apeswap_router = contract.functions.APESWAP_ROUTER().call()
-    
-    print(f"PancakeSwap: {pancake_router}")
-    print(f"Biswap: {biswap_router}")
-    print(f"ApeSwap: {apeswap_router}")
-except Exception as e:
-    print(f"⚠️  Router Address Fehler: {e}")
+pancake_router = constants.get('PANCAKESWAP_ROUTER')
+biswap_router = constants.get('BISWAP_ROUTER')
+apeswap_router = constants.get('APESWAP_ROUTER')
+
+print(f"PancakeSwap: {pancake_router}")
+print(f"Biswap: {biswap_router}")
+print(f"ApeSwap: {apeswap_router}")
 
 def test_contract_functions():
     """Teste die tatsächlich verfügbaren Funktionen"""
@@ -71,12 +74,15 @@ def test_contract_functions():
     print("-" * 40)
     
     try:
-        # 1. Owner Check
-        owner = contract.functions.owner().call()
+        # 1. + 2. Owner und Contract Token Balance - unabhängig, also ein Batch
+        owner, usdt_balance = batch_contract_calls(w3, contract, [
+            ('owner', []),
+            ('getTokenBalance', [usdt_addr])
+        ])
+        if owner is None or usdt_balance is None:
+            raise ValueError("owner()/getTokenBalance() call failed")
+            
         print(f"✅ Owner: {owner}")
-        
-        # 2. Contract Token Balance
-        usdt_balance = contract.functions.getTokenBalance(usdt_addr).call()
         print(f"✅ Contract USDT Balance: {usdt_balance}")
         
         # 3. Check Arbitrage Profit (Simulation)
@@ -161,6 +167,7 @@ def test_simple_arbitrage():
 
 def execute_real_arbitrage():
     """Führe echten Arbitrage-Trade aus"""
+    global LOCAL_NONCE
     
     print("\n🚨 REAL ARBITRAGE EXECUTION")
     print("-" * 30)
@@ -173,10 +180,6 @@ def execute_real_arbitrage():
         # Sehr kleiner Test-Amount
         test_amount = w3.to_wei(0.1, 'ether')  # 0.1 USDT
         
-        # Gas Preis
-        gas_price = w3.eth.gas_price
-        print(f"⛽ Gas Preis: {w3.from_wei(gas_price, 'gwei'):.2f} Gwei")
-        
         # Verwende executeSimpleArbitrage
         function_call = contract.functions.executeSimpleArbitrage(
             usdt_addr,
@@ -186,9 +189,19 @@ def execute_real_arbitrage():
             biswap_router
         )
         
+        # Gas Preis, Nonce, Chain ID und Gas Schätzung in einem Round-Trip
+        gas_price_reply, nonce_reply, chain_id_reply, estimate_reply = preflight_batch(w3, account.address, {
+            'to': contract.address,
+            'data': contract.encodeABI(fn_name=function_call.fn_name, args=list(function_call.args))
+        })
+        gas_price = rpc_int(gas_price_reply)
+        nonce = max(rpc_int(nonce_reply), LOCAL_NONCE)
+        chain_id = rpc_int(chain_id_reply)
+        print(f"⛽ Gas Preis: {w3.from_wei(gas_price, 'gwei'):.2f} Gwei")
+        
         # Gas schätzen
         try:
-            estimated_gas = function_call.estimate_gas({'from': account.address})
+            estimated_gas = rpc_int(estimate_reply)
             gas_limit = int(estimated_gas * 1.5)
             
             print(f"⛽ Estimated Gas: {estimated_gas:,}")
@@ -205,7 +218,8 @@ def execute_real_arbitrage():
             'from': account.address,
             'gas': gas_limit,
             'gasPrice': gas_price,
-            'nonce': w3.eth.get_transaction_count(account.address)
+            'nonce': nonce,
+            'chainId': chain_id
         })
         
         # Signieren und senden
@@ -214,11 +228,12 @@ def execute_real_arbitrage():
         print("📤 Sende Real Arbitrage Transaction...")
         raw_transaction = getattr(signed_txn, 'rawTransaction', signed_txn.raw_transaction)
         tx_hash = w3.eth.send_raw_transaction(raw_transaction)
+        LOCAL_NONCE = nonce + 1
         
         print(f"⏳ TX Hash: {tx_hash.hex()}")
         print("⏳ Warte auf Bestätigung...")
         
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+        receipt = wait_receipt_ws(w3, tx_hash, timeout=300)
         
         if receipt.status == 1:
             print("✅ ARBITRAGE TRADE ERFOLGREICH!")
@@ -4,40 +4,48 @@ Direct Contract Test - Contract hat bereits USDT Balance!
 """
 
 import os
-import json
-from web3 import Web3
 from dotenv import load_dotenv
+from rpc_client import connect, get_or_fetch_constants, load_contract, multicall_contract_calls, preflight_batch, rpc_int, wait_receipt_ws
 
 print("🎉 DIRECT CONTRACT TEST - Contract hat bereits Balance!")
 
 # Setup
 load_dotenv()
 rpc_url = os.getenv('BSC_RPC_URL')
-w3 = Web3(Web3.HTTPProvider(rpc_url))
+w3 = connect(rpc_url)
 private_key = os.getenv('PRIVATE_KEY')
 account = w3.eth.account.from_key(private_key)
 
 # Contract Setup
 contract_address = os.getenv('CONTRACT_ADDRESS')
-with open('deployed_contract.json', 'r') as f:
-    contract_info = json.load(f)
-
-contract = w3.eth.contract(address=contract_address, abi=contract_info['abi'])
+contract = load_contract(w3, contract_address, (
+    'USDT', 'BUSD', 'PANCAKESWAP_ROUTER', 'BISWAP_ROUTER',
+    'getTokenBalance', 'checkArbitrageProfit', 'executeSimpleArbitrage'
+))
 
 print(f"💼 Account: {account.address}")
 print(f"📍 Contract: {contract_address}")
 
-# Token Adressen
-usdt_addr = contract.functions.USDT().call()
-busd_addr = contract.functions.BUSD().call()
-pancake_router = contract.functions.PANCAKESWAP_ROUTER().call()
-biswap_router = contract.functions.BISWAP_ROUTER().call()
+# Token Adressen - aus dem Cache oder ein Batch statt vier Calls
+constants = get_or_fetch_constants(w3, contract, ['USDT', 'BUSD', 'PANCAKESWAP_ROUTER', 'BISWAP_ROUTER'])
+usdt_addr = constants['USDT']
+busd_addr = constants['BUSD']
+pancake_router = constants['PANCAKESWAP_ROUTER']
+biswap_router = constants['BISWAP_ROUTER']
 
 print(f"🪙 USDT: {usdt_addr}")
 print(f"🪙 BUSD: {busd_addr}")
 
-# Check Contract Balance
-contract_usdt_balance = contract.functions.getTokenBalance(usdt_addr).call()
+# Contract Balance und Profit Check (PancakeSwap -> Biswap) - ein Multicall3 eth_call statt zwei
+test_amount = w3.to_wei(0.1, 'ether')  # 0.1 USDT
+contract_usdt_balance, profit_result = multicall_contract_calls(w3, contract, [
+    ('getTokenBalance', [usdt_addr]),
+    ('checkArbitrageProfit', [usdt_addr, busd_addr, test_amount, pancake_router, biswap_router])
+])
+if contract_usdt_balance is None:
+    print("❌ getTokenBalance() call failed")
+    exit(1)
+    
 print(f"📍 Contract USDT Balance: {w3.from_wei(contract_usdt_balance, 'ether'):.6f}")
 
 if contract_usdt_balance > 0:
@@ -48,16 +56,9 @@ if contract_usdt_balance > 0:
     
     # Test 1: Profit Check
     try:
-        test_amount = w3.to_wei(0.1, 'ether')  # 0.1 USDT
-        
-        profit_result = contract.functions.checkArbitrageProfit(
-            usdt_addr,
-            busd_addr,
-            test_amount,
-            pancake_router,
-            biswap_router
-        ).call()
-        
+        if profit_result is None:
+            raise ValueError("checkArbitrageProfit() reverted")
+            
         print(f"✅ Profit Check Result: {profit_result}")
         
         # Interpretiere Ergebnis
@@ -87,7 +88,8 @@ if contract_usdt_balance > 0:
                     print("\n🚨 ECHTER ARBITRAGE TRADE!")
                     print("💸 Kosten: ~0.002-0.01 BNB Gas")
                     
-                    gas_price = w3.eth.gas_price
+                    # Gas Preis, Nonce und Chain ID in einem Round-Trip
+                    gas_price, nonce, chain_id = map(rpc_int, preflight_batch(w3, account.address))
                     
                     # Transaction bauen
                     arbitrage_txn = contract.functions.executeSimpleArbitrage(
@@ -100,7 +102,8 @@ if contract_usdt_balance > 0:
                         'from': account.address,
                         'gas': 500000,  # Großzügiges Gas Limit
                         'gasPrice': gas_price,
-                        'nonce': w3.eth.get_transaction_count(account.address)
+                        'nonce': nonce,
+                        'chainId': chain_id
                     })
                     
                     print(f"⛽ Gas Kosten: ~{(500000 * gas_price) / 10**18:.6f} BNB")
@@ -113,7 +116,7 @@ if contract_usdt_balance > 0:
                     print(f"⏳ TX Hash: {tx_hash.hex()}")
                     print("⏳ Warte auf Bestätigung...")
                     
-                    receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+                    receipt = wait_receipt_ws(w3, tx_hash, timeout=300)
                     
                     if receipt.status == 1:
                         print("🎉 ARBITRAGE TRADE ERFOLGREICH!")
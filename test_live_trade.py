@@ -5,9 +5,8 @@ Echter Flashloan-Test mit dem deployed Contract
 """
 
 import os
-import json
-from web3 import Web3
 from dotenv import load_dotenv
+from rpc_client import connect, batch_contract_calls, deployed_abi, get_block_number, load_contract, preflight_batch, rpc_int, wait_receipt_ws
 
 print("🔥 LIVE TRADE TEST mit deployed Contract!")
 
@@ -16,13 +15,13 @@ load_dotenv()
 
 # Web3 Setup
 rpc_url = os.getenv('BSC_RPC_URL')
-w3 = Web3(Web3.HTTPProvider(rpc_url))
+w3 = connect(rpc_url)
 
 if not w3.is_connected():
     print("❌ BSC Verbindung fehlgeschlagen!")
     exit(1)
 
-print(f"✅ BSC verbunden - Block: {w3.eth.block_number}")
+print(f"✅ BSC verbunden - Block: {get_block_number(w3)}")
 
 # Account Setup
 private_key = os.getenv('PRIVATE_KEY')
@@ -30,6 +29,9 @@ account = w3.eth.account.from_key(private_key)
 balance = w3.eth.get_balance(account.address)
 balance_bnb = w3.from_wei(balance, 'ether')
 
+# Lokal mitgezählte Nonce - nach jedem gesendeten Trade hochgezählt
+LOCAL_NONCE = 0
+
 print(f"💼 Account: {account.address}")
 print(f"💰 Balance: {balance_bnb:.6f} BNB")
 
@@ -42,11 +44,11 @@ if not contract_address:
 print(f"📍 Contract: {contract_address}")
 
 # Contract ABI laden
-with open('deployed_contract.json', 'r') as f:
-    contract_info = json.load(f)
+abi = deployed_abi()
+contract = load_contract(w3, contract_address)
 
-abi = contract_info['abi']
-contract = w3.eth.contract(address=contract_address, abi=abi)
+# Funktionsnamen einmal aus der ABI - "in" statt hasattr(), das jedes Mal die ABI durchsucht
+fn_names = {item['name'] for item in abi if item.get('type') == 'function'}
 
 print(f"✅ Contract geladen mit {len(abi)} Funktionen")
 
@@ -65,18 +67,8 @@ print(f"🥞 PancakeSwap: {PANCAKE_ROUTER}")
 
 # Contract Funktionen anzeigen
 print("\n📋 Verfügbare Contract Funktionen:")
-try:
-    for func in contract.all_functions():
-        try:
-            print(f"   • {func.function_identifier}")
-        except:
-            print(f"   • {func.fn_name}")
-except Exception as e:
-    print(f"   ⚠️  Funktionsliste Fehler: {e}")
-    # Alternative: ABI durchgehen
-    for item in abi:
-        if item.get('type') == 'function':
-            print(f"   • {item.get('name', 'unknown')}")
+for name in sorted(fn_names):
+    print(f"   • {name}")
 
 # Test verschiedene Funktionen
 def test_contract_functions():
@@ -86,32 +78,35 @@ def test_contract_functions():
     print("-" * 30)
     
     try:
+        # 1.-3. Owner, Balance und Factory (falls vorhanden) - unabhängig, also ein Batch
+        reads = [name for name in ('owner', 'getBalance', 'pancakeFactory') if name in fn_names]
+        values = dict(zip(reads, batch_contract_calls(w3, contract, [(name, []) for name in reads])))
+        
         # 1. Owner Test
-        if hasattr(contract.functions, 'owner'):
-            owner = contract.functions.owner().call()
-            print(f"✅ Owner: {owner}")
+        if 'owner' in values:
+            if values['owner'] is None:
+                raise ValueError("owner() call failed")
+            print(f"✅ Owner: {values['owner']}")
         
         # 2. Balance Test (falls vorhanden)
-        if hasattr(contract.functions, 'getBalance'):
-            try:
-                contract_balance = contract.functions.getBalance().call()
-                print(f"✅ Contract Balance: {contract_balance}")
-            except:
+        if 'getBalance' in values:
+            if values['getBalance'] is not None:
+                print(f"✅ Contract Balance: {values['getBalance']}")
+            else:
                 print("⚠️  getBalance() not callable")
         
         # 3. Pancake Factory Test
-        if hasattr(contract.functions, 'pancakeFactory'):
-            try:
-                factory = contract.functions.pancakeFactory().call()
-                print(f"✅ Pancake Factory: {factory}")
-            except:
+        if 'pancakeFactory' in values:
+            if values['pancakeFactory'] is not None:
+                print(f"✅ Pancake Factory: {values['pancakeFactory']}")
+            else:
                 print("⚠️  pancakeFactory() not callable")
         
         # 4. Test Flashloan Simulation
         print("\n🔍 FLASHLOAN SIMULATION TEST")
         test_amount = w3.to_wei(1, 'ether')  # 1 Token
         
-        if hasattr(contract.functions, 'testFlashloan'):
+        if 'testFlashloan' in fn_names:
             try:
                 result = contract.functions.testFlashloan(USDT, test_amount).call()
                 print(f"✅ Flashloan Simulation: {result}")
@@ -119,7 +114,7 @@ def test_contract_functions():
                 print(f"⚠️  Flashloan Simulation Fehler: {e}")
         
         # 5. Arbitrage Test (ohne Ausführung)
-        if hasattr(contract.functions, 'arbitrage'):
+        if 'arbitrage' in fn_names:
             try:
                 print("\n💡 Teste Arbitrage Funktion (Simulation)...")
                 # Teste mit kleinem Amount
@@ -145,7 +140,7 @@ def test_contract_functions():
                 return False
         
         # 6. Einzelner Flashloan Test
-        if hasattr(contract.functions, 'flashloan'):
+        if 'flashloan' in fn_names:
             try:
                 print("\n⚡ Teste Flashloan Funktion...")
                 small_amount = w3.to_wei(1, 'ether')  # 1 USDT
@@ -168,6 +163,7 @@ def test_contract_functions():
 
 def execute_real_trade():
     """Führe einen echten Mini-Trade aus (nur mit Bestätigung)"""
+    global LOCAL_NONCE
     
     print("\n🚨 ACHTUNG: ECHTER TRADE!")
     print("🔥 Führe Mini-Flashloan aus...")
@@ -180,11 +176,8 @@ def execute_real_trade():
         # Sehr kleiner Amount für Test
         test_amount = w3.to_wei(0.1, 'ether')  # 0.1 USDT
         
-        # Gas Preis
-        gas_price = w3.eth.gas_price
-        
         # Wähle beste verfügbare Funktion
-        if hasattr(contract.functions, 'arbitrage'):
+        if 'arbitrage' in fn_names:
             function_call = contract.functions.arbitrage(
                 USDT,
                 BUSD,
@@ -194,7 +187,7 @@ def execute_real_trade():
             )
             print("🔄 Verwende arbitrage() Funktion")
             
-        elif hasattr(contract.functions, 'flashloan'):
+        elif 'flashloan' in fn_names:
             function_call = contract.functions.flashloan(
                 USDT,
                 test_amount
@@ -205,9 +198,18 @@ def execute_real_trade():
             print("❌ Keine ausführbare Funktion gefunden!")
             return False
         
+        # Gas Preis, Nonce, Chain ID und Gas Schätzung in einem Round-Trip
+        gas_price_reply, nonce_reply, chain_id_reply, estimate_reply = preflight_batch(w3, account.address, {
+            'to': contract.address,
+            'data': contract.encodeABI(fn_name=function_call.fn_name, args=list(function_call.args))
+        })
+        gas_price = rpc_int(gas_price_reply)
+        nonce = max(rpc_int(nonce_reply), LOCAL_NONCE)
+        chain_id = rpc_int(chain_id_reply)
+        
         # Gas schätzen
         try:
-            estimated_gas = function_call.estimate_gas({'from': account.address})
+            estimated_gas = rpc_int(estimate_reply)
             gas_limit = int(estimated_gas * 1.5)  # 50% Buffer
             
             print(f"⛽ Geschätztes Gas: {estimated_gas:,}")
@@ -225,7 +227,8 @@ def execute_real_trade():
             'from': account.address,
             'gas': gas_limit,
             'gasPrice': gas_price,
-            'nonce': w3.eth.get_transaction_count(account.address)
+            'nonce': nonce,
+            'chainId': chain_id
         })
         
         # Signieren
@@ -235,11 +238,12 @@ def execute_real_trade():
         print("📤 Sende Transaction...")
         raw_transaction = getattr(signed_txn, 'rawTransaction', signed_txn.raw_transaction)
         tx_hash = w3.eth.send_raw_transaction(raw_transaction)
+        LOCAL_NONCE = nonce + 1
         
         print(f"⏳ TX Hash: {tx_hash.hex()}")
         print("⏳ Warte auf Bestätigung...")
         
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+        receipt = wait_receipt_ws(w3, tx_hash, timeout=300)
         
         if receipt.status == 1:
             print("✅ TRADE ERFOLGREICH!")
@@ -0,0 +1,71 @@
+"""
+Tests for the shared hand-rolled ABI encoders both scanners and multicall() build their calls with
+Each one must match eth_abi byte for byte
+"""
+
+import os
+import sys
+
+from eth_abi import encode
+from web3 import Web3
+
+# The encoders live in python_scanner/, whose modules import each other directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python_scanner'))
+
+from abi_encoding import (
+    AGGREGATE3_SELECTOR,
+    GET_AMOUNTS_OUT_SELECTOR,
+    GET_PAIR_SELECTOR,
+    GET_RESERVES_SELECTOR,
+    TOKEN0_SELECTOR,
+    TOKEN1_SELECTOR,
+    encode_aggregate3,
+    encode_aggregate3_call,
+    encode_get_amounts_out,
+    encode_get_pair,
+)
+
+WBNB = '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c'
+BUSD = '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56'
+PANCAKE_ROUTER = '0x10ED43C718714eb63d5aA57B78B54704E256024E'
+PAIR = '0x58F876857a02D6762E0101bb5C46A8c1ED44Dc16'
+
+def raw(address: str) -> bytes:
+    return bytes.fromhex(address[2:])
+
+def selector(signature: str) -> bytes:
+    return bytes(Web3.keccak(text=signature)[:4])
+
+def test_selectors_match_signatures():
+    assert AGGREGATE3_SELECTOR == selector('aggregate3((address,bool,bytes)[])')
+    assert GET_AMOUNTS_OUT_SELECTOR == selector('getAmountsOut(uint256,address[])')
+    assert GET_PAIR_SELECTOR == selector('getPair(address,address)')
+    assert GET_RESERVES_SELECTOR == selector('getReserves()')
+    assert TOKEN0_SELECTOR == selector('token0()')
+    assert TOKEN1_SELECTOR == selector('token1()')
+
+def test_encode_get_amounts_out_matches_eth_abi():
+    expected = GET_AMOUNTS_OUT_SELECTOR + encode(['uint256', 'address[]'], [10**18, [WBNB, BUSD]])
+
+    assert encode_get_amounts_out(10**18, raw(WBNB), raw(BUSD)) == expected
+
+def test_encode_get_pair_matches_eth_abi():
+    expected = GET_PAIR_SELECTOR + encode(['address', 'address'], [WBNB, BUSD])
+
+    assert encode_get_pair(raw(WBNB), raw(BUSD)) == expected
+
+def test_encode_aggregate3_matches_eth_abi():
+    # Mixed calldata lengths: selector only, word aligned and unaligned
+    calls = [
+        (PAIR, GET_RESERVES_SELECTOR),
+        (PANCAKE_ROUTER, encode_get_amounts_out(12345, raw(WBNB), raw(BUSD))),
+        (PAIR, GET_PAIR_SELECTOR + bytes(33))
+    ]
+    expected = AGGREGATE3_SELECTOR + encode(
+        ['(address,bool,bytes)[]'], [[(target, True, calldata) for target, calldata in calls]]
+    )
+
+    assert encode_aggregate3([encode_aggregate3_call(raw(target), calldata) for target, calldata in calls]) == expected
+
+def test_encode_aggregate3_without_calls():
+    assert encode_aggregate3([]) == AGGREGATE3_SELECTOR + encode(['(address,bool,bytes)[]'], [[]])
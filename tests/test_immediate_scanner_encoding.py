@@ -0,0 +1,107 @@
+"""
+Tests for the immediate scanner's hand-rolled encoders, signer and V2 math
+Each one replaces web3/eth_account on the trade path, so they must match them byte for byte
+"""
+
+import os
+import sys
+
+from eth_account import Account
+from eth_keys import keys
+from web3 import Web3
+
+# The scanner lives in python_scanner/ and imports its siblings directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'python_scanner'))
+
+from immediate_scanner import (
+    best_round_trip,
+    compute_v2_pair,
+    encode_execute_flashloan,
+    sign_legacy_transaction,
+    v2_out,
+)
+
+# Fixed test key - never funded, never used on chain
+PRIVATE_KEY = '0x4c0883a69102937d6231471b5dbb6204fe5129617082792ae468d01a3f362318'
+
+PAIR = '0x58F876857a02D6762E0101bb5C46A8c1ED44Dc16'
+WBNB = '0xbb4CdB9CBd36B01bD1cBaEBF2De08d9173bc095c'
+BUSD = '0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56'
+PANCAKE_ROUTER = '0x10ED43C718714eb63d5aA57B78B54704E256024E'
+BISWAP_ROUTER = '0x3a6d8cA21D1CF76F653A67577FA0D27453350dD8'
+FLASHLOAN_CONTRACT = '0x86742335Ec7CC7bBaa7d4244841c315Cf1978eAE'
+
+PANCAKE_FACTORY = '0xcA143Ce32Fe78f1f7019d7d551a6402fC5350c73'
+PANCAKE_INIT_CODE_HASH = '0x00fb7f630766e6a796048ea87d01acd3068e8ff67d078148a3fa3f4a84f69bd5'
+
+EXECUTE_FLASHLOAN_ABI = [{
+    "inputs": [
+        {"internalType": "address", "name": "pairAddress", "type": "address"},
+        {"internalType": "uint256", "name": "amount0Out", "type": "uint256"},
+        {"internalType": "uint256", "name": "amount1Out", "type": "uint256"},
+        {"internalType": "address", "name": "tokenBorrow", "type": "address"},
+        {"internalType": "address", "name": "tokenTarget", "type": "address"},
+        {"internalType": "address", "name": "buyRouter", "type": "address"},
+        {"internalType": "address", "name": "sellRouter", "type": "address"}
+    ],
+    "name": "executeFlashloan",
+    "outputs": [],
+    "stateMutability": "nonpayable",
+    "type": "function"
+}]
+
+FLASHLOAN_ARGS = [PAIR, 0, 10**18, BUSD, WBNB, PANCAKE_ROUTER, BISWAP_ROUTER]
+
+def test_encode_execute_flashloan_matches_web3():
+    contract = Web3().eth.contract(address=FLASHLOAN_CONTRACT, abi=EXECUTE_FLASHLOAN_ABI)
+    expected = contract.encodeABI(fn_name='executeFlashloan', args=FLASHLOAN_ARGS)
+
+    assert '0x' + encode_execute_flashloan(*FLASHLOAN_ARGS).hex() == expected
+
+def test_sign_legacy_transaction_matches_eth_account():
+    data = encode_execute_flashloan(*FLASHLOAN_ARGS)
+    signed = Account.sign_transaction({
+        'nonce': 7,
+        'gasPrice': 3 * 10**9,
+        'gas': 500000,
+        'to': FLASHLOAN_CONTRACT,
+        'value': 0,
+        'data': data,
+        'chainId': 56
+    }, PRIVATE_KEY)
+
+    raw = sign_legacy_transaction(
+        keys.PrivateKey(bytes.fromhex(PRIVATE_KEY[2:])),
+        7, 3 * 10**9, 500000, bytes.fromhex(FLASHLOAN_CONTRACT[2:]), data, 56
+    )
+    assert raw == bytes(signed.rawTransaction)
+
+def test_compute_v2_pair_matches_deployed_pair():
+    # PancakeSwap V2 WBNB/BUSD pair on BSC mainnet
+    assert compute_v2_pair(PANCAKE_FACTORY, WBNB, BUSD, PANCAKE_INIT_CODE_HASH) == PAIR
+    # Token order must not matter
+    assert compute_v2_pair(PANCAKE_FACTORY, BUSD, WBNB, PANCAKE_INIT_CODE_HASH) == PAIR
+
+def test_v2_out_matches_router_formula():
+    # UniswapV2Library.getAmountOut with PancakeSwap's 0.25% fee (9975/10000)
+    assert v2_out(1000, 10000, 20000, 25) == 1000 * 9975 * 20000 // (10000 * 10000 + 1000 * 9975)
+    assert v2_out(1000, 10000, 20000, 25) == 1814
+    assert v2_out(0, 10000, 20000, 25) == 0
+
+def test_best_round_trip_matches_brute_force():
+    amount_in = 10**18
+    reserves = [(500 * 10**18, 150000 * 10**18), (800 * 10**18, 236000 * 10**18), (300 * 10**18, 91500 * 10**18)]
+    fees = [25, 10, 20]
+
+    buy, sell, final_amount, amounts_out = best_round_trip(amount_in, reserves, fees)
+
+    assert amounts_out == [v2_out(amount_in, r_in, r_out, fee) for (r_in, r_out), fee in zip(reserves, fees)]
+    routes = {
+        (b, s): v2_out(amounts_out[b], reserves[s][1], reserves[s][0], fees[s])
+        for b in range(len(reserves)) for s in range(len(reserves)) if b != s
+    }
+    assert (buy, sell) == max(routes, key=routes.get)
+    assert final_amount == routes[(buy, sell)]
+
+def test_best_round_trip_without_a_second_dex():
+    assert best_round_trip(10**18, [(10**20, 10**20)], [25])[:3] == (-1, -1, 0)